@@ -5,6 +5,10 @@ from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from .database import db
 from .models import UserInDB
+from .cache import user_cache
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
 import os
 
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
@@ -13,24 +17,37 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/token")
+logger = logging.getLogger(__name__)
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+# bcrypt deliberately burns 100ms+ of CPU per call; cap how many run at once
+# and keep them off the event loop so other requests aren't stalled
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def verify_password(plain_password, hashed_password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, pwd_context.verify, plain_password, hashed_password)
+
+async def get_password_hash(password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, pwd_context.hash, password)
 
 async def get_user(username: str):
+    cached = user_cache.get(username)
+    if cached is not None:
+        return cached
     user = await db.users.find_one({"username": username})
     if user:
-        return UserInDB(**user, id=str(user["_id"]))
+        user = UserInDB(**user, id=str(user["_id"]))
+        user_cache.set(username, user)
+        return user
     return None
 
 async def authenticate_user(username: str, password: str):
     user = await get_user(username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password(password, user.hashed_password):
         return False
     return user
 
@@ -42,7 +59,6 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return encoded_jwt
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
-    print(f"[DEBUG] Received token: {token}")
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -51,18 +67,17 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
-        print(f"[DEBUG] Token payload username: {username}")
         if username is None:
-            print("[DEBUG] Username missing in token payload.")
+            logger.debug("auth rejected reason=missing_sub")
             raise credentials_exception
     except JWTError as e:
-        print(f"[DEBUG] JWTError: {e}")
+        logger.debug("auth rejected reason=jwt_error error=%s", e)
         raise credentials_exception
     user = await get_user(username)
     if user is None:
-        print(f"[DEBUG] No user found in DB for username: {username}")
+        logger.debug("auth rejected reason=unknown_user username=%s", username)
         raise credentials_exception
-    print(f"[DEBUG] Authenticated user: {user.username}, role: {user.role}")
+    logger.debug("auth ok username=%s role=%s", user.username, user.role)
     return user
 
 async def get_current_active_user(current_user: UserInDB = Depends(get_current_user)):
@@ -1,7 +1,30 @@
 from .database import db
+from .pdf_cache import pdf_cache
+from .cache import user_cache
+from .pubsub import broker, notification_event
+from .rendering import render_markdown, MARKDOWN_RENDER_VERSION
 from .models import UserCreate, FeedbackCreate, FeedbackUpdate, PeerReviewCreate
-from datetime import datetime
+from datetime import datetime, timedelta
 from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from collections import Counter
+import asyncio
+import base64
+import os
+import random
+import uuid
+
+# Fields a caller may request through the ``fields`` projection; the ids and
+# created_at are always returned because names and page cursors depend on them.
+FEEDBACK_FIELDS = {"strengths", "areas_to_improve", "sentiment", "tags", "acknowledged", "employee_comment", "updated_at"}
+FEEDBACK_REQUIRED_FIELDS = {"employee_id", "manager_id", "created_at"}
+NEWEST_FIRST = [("created_at", -1), ("_id", -1)]
+USER_PUBLIC_FIELDS = {"username": 1, "full_name": 1, "role": 1}
+# Oldest notifications beyond this many per user are dropped on insert
+NOTIFICATION_MAX_PER_USER = int(os.getenv("NOTIFICATION_MAX_PER_USER", "200"))
+# Periods with fewer peer reviews than this are withheld from the summary
+PEER_REVIEW_MIN_COUNT = int(os.getenv("PEER_REVIEW_MIN_COUNT", "3"))
 
 async def create_user(user: UserCreate, hashed_password: str):
     doc = user.dict()
@@ -10,6 +33,7 @@ async def create_user(user: UserCreate, hashed_password: str):
     if user.role == "manager":
         doc["team"] = []
     result = await db.users.insert_one(doc)
+    user_cache.invalidate(user.username)
     return str(result.inserted_id)
 
 async def get_user_by_id(user_id: str):
@@ -24,6 +48,8 @@ async def add_employee_to_manager(manager_id: str, employee_id: str):
         {"_id": ObjectId(manager_id)},
         {"$addToSet": {"team": employee_id}}
     )
+    # The manager's cached UserInDB still carries the old team
+    user_cache.invalidate_where(lambda u: u.id == manager_id)
 
 async def get_manager_for_employee(employee_id: str):
     manager = await db.users.find_one({"role": "manager", "team": employee_id})
@@ -32,62 +58,338 @@ async def get_manager_for_employee(employee_id: str):
         return manager
     return None
 
+async def get_users_by_ids(user_ids, projection=None):
+    """Fetch many users with one $in query, in the order of ``user_ids``; unknown ids are skipped."""
+    object_ids = [ObjectId(uid) for uid in set(user_ids) if uid and ObjectId.is_valid(uid)]
+    if not object_ids:
+        return []
+    users = {}
+    async for user in db.users.find({"_id": {"$in": object_ids}}, projection or USER_PUBLIC_FIELDS):
+        user["id"] = str(user["_id"])
+        users[user["id"]] = user
+    return [users[uid] for uid in dict.fromkeys(user_ids) if uid in users]
+
 async def get_peers_for_employee(employee_id: str):
     manager = await get_manager_for_employee(employee_id)
     if not manager or not manager.get("team"):
         return []
-
-    peers = []
     # Exclude the current employee from their own peer list
     peer_ids = [pid for pid in manager["team"] if pid != employee_id]
-    
-    for peer_id in peer_ids:
-        peer = await get_user_by_id(peer_id)
-        if peer:
-            peers.append(peer)
-            
-    return peers
+    return await get_users_by_ids(peer_ids)
 
-async def create_feedback(manager_id: str, feedback: FeedbackCreate):
-    now = datetime.utcnow()
+async def are_peers(employee_id: str, other_id: str):
+    # Peers share a manager: one lookup for a manager whose team holds both ids
+    if employee_id == other_id:
+        return False
+    count = await db.users.count_documents(
+        {"role": "manager", "team": {"$all": [employee_id, other_id]}}, limit=1
+    )
+    return count > 0
+
+def _new_feedback_doc(manager_id: str, feedback: FeedbackCreate, now: datetime):
     doc = feedback.dict()
     doc["manager_id"] = manager_id
     doc["created_at"] = now
     doc["updated_at"] = now
     doc["acknowledged"] = False
     doc["employee_comment"] = None
+    return doc
+
+async def create_feedback(manager_id: str, feedback: FeedbackCreate):
+    doc = _new_feedback_doc(manager_id, feedback, datetime.utcnow())
     result = await db.feedbacks.insert_one(doc)
+    await _apply_stat_updates(_stat_updates(doc, 1))
     return str(result.inserted_id)
 
-async def get_feedbacks_for_employee(employee_id: str):
+async def create_feedbacks(manager_id: str, feedbacks):
+    """Insert many feedbacks with one unordered insert_many.
+
+    Returns one (feedback_id, error) pair per input, in order; exactly one of the two is None.
+    """
+    now = datetime.utcnow()
+    docs = [_new_feedback_doc(manager_id, fb, now) for fb in feedbacks]
+    if not docs:
+        return []
+    errors = {}
+    try:
+        await db.feedbacks.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        errors = {err["index"]: err.get("errmsg", "Write failed") for err in e.details.get("writeErrors", [])}
+    inserted = [doc for i, doc in enumerate(docs) if i not in errors]
+    await _apply_stat_updates([op for doc in inserted for op in _stat_updates(doc, 1)])
+    return [
+        (None, errors[i]) if i in errors else (str(doc["_id"]), None)
+        for i, doc in enumerate(docs)
+    ]
+
+# --- Feedback statistics rollup ---
+# One counter per (manager, employee, month, sentiment-or-tag), kept current
+# by create_feedback/update_feedback so reads never touch the feedback history.
+STAT_KEY_FIELDS = ["manager_id", "employee_id", "period", "kind", "value"]
+# A backfill claimed longer ago than this is assumed dead and may be taken over
+STATS_BACKFILL_STALE_SECONDS = int(os.getenv("STATS_BACKFILL_STALE_SECONDS", "600"))
+STATS_BACKFILL_MARKER = {"_id": "feedback_stats_backfill"}
+
+def _stat_updates(fb, delta: int):
+    base = {
+        "manager_id": fb["manager_id"],
+        "employee_id": fb["employee_id"],
+        "period": fb["created_at"].strftime("%Y-%m"),
+    }
+    keys = [("sentiment", fb.get("sentiment"))] + [("tag", tag) for tag in set(fb.get("tags") or [])]
+    return [
+        UpdateOne({**base, "kind": kind, "value": value}, {"$inc": {"count": delta}}, upsert=True)
+        for kind, value in keys if value
+    ]
+
+async def _apply_stat_updates(ops):
+    if ops:
+        await db.feedback_stats.bulk_write(ops, ordered=False)
+
+async def rebuild_feedback_stats():
+    """Recompute the rollup from the raw feedback collection (backfill / repair).
+
+    The rollup is built in a staging collection and renamed over the live one,
+    so readers see either the old counters or the complete new set. Increments
+    made while it runs are lost in the swap; run it only while feedback writes
+    are quiet (ensure_feedback_stats does, before any worker serves).
+    """
+    period = {"$dateToString": {"format": "%Y-%m", "date": "$created_at"}}
+    merge = {"$merge": {"into": "feedback_stats_rebuild", "on": STAT_KEY_FIELDS, "whenMatched": "replace", "whenNotMatched": "insert"}}
+    reshape = {"$project": {
+        "_id": 0, "manager_id": "$_id.manager_id", "employee_id": "$_id.employee_id",
+        "period": "$_id.period", "kind": "$_id.kind", "value": "$_id.value", "count": 1,
+    }}
+    staging = db.feedback_stats_rebuild
+    await staging.drop()
+    # $merge needs the unique key index, and the rename carries it over to feedback_stats
+    await staging.create_index([(field, ASCENDING) for field in STAT_KEY_FIELDS], unique=True)
+    await db.feedbacks.aggregate([
+        {"$group": {
+            "_id": {"manager_id": "$manager_id", "employee_id": "$employee_id", "period": period,
+                    "kind": "sentiment", "value": "$sentiment"},
+            "count": {"$sum": 1},
+        }},
+        reshape,
+        merge,
+    ]).to_list(None)
+    await db.feedbacks.aggregate([
+        {"$project": {"manager_id": 1, "employee_id": 1, "created_at": 1,
+                      "tags": {"$setUnion": [{"$ifNull": ["$tags", []]}, []]}}},
+        {"$unwind": "$tags"},
+        {"$group": {
+            "_id": {"manager_id": "$manager_id", "employee_id": "$employee_id", "period": period,
+                    "kind": "tag", "value": "$tags"},
+            "count": {"$sum": 1},
+        }},
+        reshape,
+        merge,
+    ]).to_list(None)
+    await staging.rename("feedback_stats", dropTarget=True)
+
+async def _claim_stats_backfill() -> bool:
+    now = datetime.utcnow()
+    try:
+        await db.meta.insert_one({**STATS_BACKFILL_MARKER, "state": "building", "claimed_at": now})
+        return True
+    except DuplicateKeyError:
+        # Take over a claim whose worker died mid-build
+        stale = await db.meta.find_one_and_update(
+            {**STATS_BACKFILL_MARKER, "state": "building",
+             "claimed_at": {"$lt": now - timedelta(seconds=STATS_BACKFILL_STALE_SECONDS)}},
+            {"$set": {"claimed_at": now}}
+        )
+        return stale is not None
+
+async def ensure_feedback_stats():
+    """First start after upgrading: one worker backfills the rollup, the rest wait.
+
+    Runs in the lifespan before the worker serves, so no worker is writing
+    feedback (and bumping counters) while the backfill reads and swaps.
+    """
+    while True:
+        if await _claim_stats_backfill():
+            try:
+                if await db.feedback_stats.estimated_document_count() == 0 and await db.feedbacks.estimated_document_count() > 0:
+                    await rebuild_feedback_stats()
+            except Exception:
+                # Release the claim so another worker can retry
+                await db.meta.delete_one(STATS_BACKFILL_MARKER)
+                raise
+            await db.meta.update_one(STATS_BACKFILL_MARKER, {"$set": {"state": "done", "done_at": datetime.utcnow()}})
+            return
+        marker = await db.meta.find_one(STATS_BACKFILL_MARKER)
+        if marker is not None and marker["state"] == "done":
+            return
+        await asyncio.sleep(1)
+
+async def get_manager_stats(manager_id: str, since: str = None):
+    match = {"manager_id": manager_id, "count": {"$gt": 0}}
+    if since:
+        match["period"] = {"$gte": since}
+    def group_by(field):
+        return [{"$group": {"_id": {field: f"${field}", "kind": "$kind", "value": "$value"}, "count": {"$sum": "$count"}}}]
+    result = await db.feedback_stats.aggregate([
+        {"$match": match},
+        {"$facet": {"by_employee": group_by("employee_id"), "by_period": group_by("period")}},
+    ]).to_list(1)
+    facets = result[0] if result else {"by_employee": [], "by_period": []}
+
+    def collect(rows, field):
+        buckets = {}
+        for row in rows:
+            bucket = buckets.setdefault(row["_id"][field], {field: row["_id"][field], "total": 0, "sentiment": {}, "tags": {}})
+            if row["_id"]["kind"] == "sentiment":
+                bucket["sentiment"][row["_id"]["value"]] = row["count"]
+                bucket["total"] += row["count"]
+            else:
+                bucket["tags"][row["_id"]["value"]] = row["count"]
+        return buckets
+
+    employees = collect(facets["by_employee"], "employee_id")
+    periods = collect(facets["by_period"], "period")
+    names = await _get_user_names(list(employees))
+    for employee_id, bucket in employees.items():
+        bucket["employee_name"] = names.get(employee_id, "Unknown")
+    totals = {"total": 0, "sentiment": {}, "tags": {}}
+    for bucket in periods.values():
+        totals["total"] += bucket["total"]
+        for kind in ("sentiment", "tags"):
+            for value, count in bucket[kind].items():
+                totals[kind][value] = totals[kind].get(value, 0) + count
+    return {
+        "totals": totals,
+        "employees": sorted(employees.values(), key=lambda b: b["employee_name"]),
+        "periods": sorted(periods.values(), key=lambda b: b["period"]),
+    }
+
+async def _get_user_names(user_ids):
+    # Resolve every distinct id in one $in query instead of one find_one per row
+    users = await get_users_by_ids(user_ids, {"full_name": 1})
+    return {user["id"]: user.get("full_name") for user in users}
+
+async def _attach_names(feedbacks):
+    user_ids = [fb.get("employee_id") for fb in feedbacks] + [fb.get("manager_id") for fb in feedbacks]
+    names = await _get_user_names(user_ids)
+    for fb in feedbacks:
+        fb["employee_name"] = names.get(fb.get("employee_id"), "Unknown")
+        fb["manager_name"] = names.get(fb.get("manager_id"), "Unknown")
+    return feedbacks
+
+def page_cursor(doc):
+    # Opaque keyset cursor for newest-first listings sorted on (created_at, _id)
+    raw = f"{doc['created_at'].isoformat()}|{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_page_cursor(cursor: str):
+    try:
+        created_at, oid = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), ObjectId(oid)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def _after_page_cursor(cursor: str):
+    created_at, oid = _decode_page_cursor(cursor)
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": oid}},
+    ]}
+
+async def _find_feedbacks(query: dict, limit: int = None, after: str = None, fields=None):
+    # Keyset pagination on (created_at, _id), newest first
+    if after:
+        query = {**query, **_after_page_cursor(after)}
+    projection = None
+    if fields is not None:
+        projection = {f: 1 for f in set(fields) | FEEDBACK_REQUIRED_FIELDS}
+        if "employee_comment" in fields:
+            projection.update({"employee_comment_html": 1, "employee_comment_html_version": 1})
+    cursor = db.feedbacks.find(query, projection).sort(NEWEST_FIRST)
+    if limit:
+        cursor = cursor.limit(limit)
     feedbacks = []
-    employee = await get_user_by_id(employee_id)
-    async for fb in db.feedbacks.find({"employee_id": employee_id}).sort("created_at", -1):
+    async for fb in cursor:
         fb["id"] = str(fb["_id"])
-        if employee:
-            fb["employee_name"] = employee["full_name"]
-        manager = await get_user_by_id(fb["manager_id"])
-        if manager:
-            fb["manager_name"] = manager["full_name"]
-        else:
-            fb["manager_name"] = "Unknown"
         feedbacks.append(fb)
-    return feedbacks
+    await _refresh_comment_html(feedbacks)
+    return await _attach_names(feedbacks)
+
+def _comment_html_fields(comment):
+    return {
+        "employee_comment_html": render_markdown(comment) if comment else None,
+        "employee_comment_html_version": MARKDOWN_RENDER_VERSION,
+    }
+
+async def _refresh_comment_html(feedbacks):
+    # Comments are rendered once when written; only rows stored before that,
+    # or under an older renderer version, are rendered here and saved back
+    ops = []
+    for fb in feedbacks:
+        comment = fb.get("employee_comment")
+        if not comment or fb.get("employee_comment_html_version") == MARKDOWN_RENDER_VERSION:
+            continue
+        rendered = _comment_html_fields(comment)
+        fb.update(rendered)
+        ops.append(UpdateOne({"_id": fb["_id"], "employee_comment": comment}, {"$set": rendered}))
+    if ops:
+        await db.feedbacks.bulk_write(ops, ordered=False)
+
+def search_cursor(fb):
+    raw = f"{fb['score']!r}|{fb['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_search_cursor(cursor: str):
+    try:
+        score, oid = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return float(score), ObjectId(oid)
+    except Exception:
+        raise ValueError("Invalid cursor")
 
-async def get_feedbacks_for_manager(manager_id: str):
+async def search_feedbacks(owner_field: str, owner_id: str, q: str, limit: int = 20, after: str = None):
+    """Text search over one owner's feedback, best match first, keyset-paginated on (score, _id)."""
+    pipeline = [
+        {"$match": {"$text": {"$search": q}, owner_field: owner_id}},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+    ]
+    if after:
+        score, oid = _decode_search_cursor(after)
+        pipeline.append({"$match": {"$or": [
+            {"score": {"$lt": score}},
+            {"score": score, "_id": {"$lt": oid}},
+        ]}})
+    pipeline += [{"$sort": {"score": -1, "_id": -1}}, {"$limit": limit}]
     feedbacks = []
-    manager = await get_user_by_id(manager_id)
-    async for fb in db.feedbacks.find({"manager_id": manager_id}).sort("created_at", -1):
+    async for fb in db.feedbacks.aggregate(pipeline):
         fb["id"] = str(fb["_id"])
-        if manager:
-            fb["manager_name"] = manager["full_name"]
-        employee = await get_user_by_id(fb["employee_id"])
-        if employee:
-            fb["employee_name"] = employee["full_name"]
-        else:
-            fb["employee_name"] = "Unknown"
         feedbacks.append(fb)
-    return feedbacks
+    await _refresh_comment_html(feedbacks)
+    return await _attach_names(feedbacks)
+
+async def iter_feedback_batches(owner_field: str, owner_id: str, batch_size: int = 500):
+    # Stream an owner's full history in batches, resolving names once per batch
+    cursor = db.feedbacks.find({owner_field: owner_id}).sort(NEWEST_FIRST).batch_size(batch_size)
+    batch = []
+    async for fb in cursor:
+        fb["id"] = str(fb["_id"])
+        batch.append(fb)
+        if len(batch) >= batch_size:
+            yield await _attach_names(batch)
+            batch = []
+    if batch:
+        yield await _attach_names(batch)
+
+async def get_feedback_versions(owner_field: str, owner_id: str):
+    # (id, updated_at) pairs in export order; enough to address a cached PDF without loading bodies
+    versions = []
+    async for fb in db.feedbacks.find({owner_field: owner_id}, {"updated_at": 1}).sort(NEWEST_FIRST):
+        versions.append((str(fb["_id"]), fb.get("updated_at")))
+    return versions
+
+async def get_feedbacks_for_employee(employee_id: str, limit: int = None, after: str = None, fields=None):
+    return await _find_feedbacks({"employee_id": employee_id}, limit, after, fields)
+
+async def get_feedbacks_for_manager(manager_id: str, limit: int = None, after: str = None, fields=None):
+    return await _find_feedbacks({"manager_id": manager_id}, limit, after, fields)
 
 async def update_feedback(feedback_id: str, update: FeedbackUpdate):
     update_dict = {}
@@ -98,53 +400,152 @@ async def update_feedback(feedback_id: str, update: FeedbackUpdate):
             update_dict[k] = v
     if update_dict:
         update_dict["updated_at"] = datetime.utcnow()
-        await db.feedbacks.update_one(
-            {"_id": ObjectId(feedback_id)},
-            {"$set": update_dict}
-        )
+        if "employee_comment" in update_dict:
+            update_dict.update(_comment_html_fields(update_dict["employee_comment"]))
+        if "sentiment" in update_dict or "tags" in update_dict:
+            # Need the old values to move the rollup counters
+            before = await db.feedbacks.find_one_and_update(
+                {"_id": ObjectId(feedback_id)},
+                {"$set": update_dict},
+                return_document=ReturnDocument.BEFORE
+            )
+            if before:
+                await _apply_stat_updates(_stat_updates(before, -1) + _stat_updates({**before, **update_dict}, 1))
+        else:
+            await db.feedbacks.update_one(
+                {"_id": ObjectId(feedback_id)},
+                {"$set": update_dict}
+            )
+        pdf_cache.invalidate_feedback(feedback_id)
 
-async def get_feedback_by_id(feedback_id: str):
+async def get_feedback_by_id(feedback_id: str, names: bool = True):
+    # Malformed ids can't match anything; treat them as not found rather than erroring
+    if not ObjectId.is_valid(feedback_id):
+        return None
     fb = await db.feedbacks.find_one({"_id": ObjectId(feedback_id)})
     if fb:
         fb["id"] = str(fb["_id"])
-        employee = await get_user_by_id(fb["employee_id"])
-        if employee:
-            fb["employee_name"] = employee["full_name"]
-        manager = await get_user_by_id(fb["manager_id"])
-        if manager:
-            fb["manager_name"] = manager["full_name"]
+        await _refresh_comment_html([fb])
+        if names:
+            await _attach_names([fb])
         return fb
     return None
 
-async def create_notification(user_id: str, message: str):
-    now = datetime.utcnow()
-    doc = {
+def new_notification_doc(user_id: str, message: str, now: datetime = None):
+    # The _id is assigned up front so a retried insert can't write a row twice
+    return {
+        "_id": ObjectId(),
         "user_id": user_id,
         "message": message,
         "read": False,
-        "created_at": now
+        "created_at": now or datetime.utcnow()
     }
-    await db.notifications.insert_one(doc)
 
-async def get_notifications(user_id: str):
+async def insert_notifications(docs):
+    """Insert prepared notification docs with one insert_many, then publish and trim.
+
+    Safe to retry with the same docs: rows an earlier attempt wrote fail as
+    duplicate _ids and are treated as written.
+    """
+    if not docs:
+        return
+    try:
+        await db.notifications.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        if e.details.get("writeConcernErrors") or any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+    for doc in docs:
+        await broker.publish(doc["user_id"], notification_event(doc))
+    await asyncio.gather(*(_trim_notifications(user_id) for user_id in {doc["user_id"] for doc in docs}))
+
+async def create_coalesced_notification(user_id: str, message: str, coalesce_key: str, window_seconds: int):
+    """Keep one notification per (user, key), counting repeats that arrive within
+    ``window_seconds`` of the previous one.
+
+    A repeat inside the window bumps ``count``; one after a longer gap restarts
+    it at 1. Either way the notification moves back to the top as unread.
+    """
+    now = datetime.utcnow()
+    query = {"user_id": user_id, "coalesce_key": coalesce_key}
+    # Pipeline update so the window test can read the stored created_at
+    update = [
+        {"$set": {
+            "count": {"$cond": [
+                {"$gte": ["$created_at", now - timedelta(seconds=window_seconds)]},
+                {"$add": [{"$ifNull": ["$count", 0]}, 1]},
+                1,
+            ]},
+            "message": {"$literal": message},
+            "read": False,
+            "created_at": now,
+        }},
+        {"$unset": "read_at"},
+    ]
+    try:
+        doc = await db.notifications.find_one_and_update(query, update, upsert=True, return_document=ReturnDocument.AFTER)
+    except DuplicateKeyError:
+        # A concurrent upsert inserted first; the retry updates its document
+        doc = await db.notifications.find_one_and_update(query, update, return_document=ReturnDocument.AFTER)
+    if doc["count"] == 1:
+        await _trim_notifications(user_id)
+    # Created, restarted or bumped, the unread count is what open streams need
+    await broker.publish(user_id, {"type": "resync"})
+
+async def claim_idempotency_key(user_id: str, key: str) -> bool:
+    """True the first time a user presents ``key``; False for a replay within the TTL."""
+    try:
+        await db.idempotency_keys.insert_one({"_id": f"{user_id}:{key}", "created_at": datetime.utcnow()})
+    except DuplicateKeyError:
+        return False
+    return True
+
+async def _trim_notifications(user_id: str):
+    # Find the newest notification past the cap and drop it and everything older
+    overflow = await db.notifications.find(
+        {"user_id": user_id}, {"created_at": 1}
+    ).sort(NEWEST_FIRST).skip(NOTIFICATION_MAX_PER_USER).limit(1).to_list(1)
+    if overflow:
+        oldest_kept = overflow[0]
+        await db.notifications.delete_many({"user_id": user_id, "$or": [
+            {"created_at": {"$lt": oldest_kept["created_at"]}},
+            {"created_at": oldest_kept["created_at"], "_id": {"$lte": oldest_kept["_id"]}},
+        ]})
+
+async def get_notifications(user_id: str, limit: int = None, after: str = None):
+    query = {"user_id": user_id}
+    if after:
+        query.update(_after_page_cursor(after))
+    cursor = db.notifications.find(query, {"coalesce_key": 0}).sort(NEWEST_FIRST)
+    if limit:
+        cursor = cursor.limit(limit)
     notes = []
-    async for n in db.notifications.find({"user_id": user_id}).sort("created_at", -1):
+    async for n in cursor:
         n["id"] = str(n["_id"])
         notes.append(n)
     return notes
 
 async def mark_notification_read(notification_id: str):
+    # read_at drives the TTL index that expires read notifications
     await db.notifications.update_one(
-        {"_id": ObjectId(notification_id)},
-        {"$set": {"read": True}}
+        {"_id": ObjectId(notification_id), "read": False},
+        {"$set": {"read": True, "read_at": datetime.utcnow()}}
     )
 
+async def mark_notifications_read(user_id: str, notification_ids):
+    object_ids = [ObjectId(nid) for nid in notification_ids if ObjectId.is_valid(nid)]
+    if object_ids:
+        await db.notifications.update_many(
+            {"_id": {"$in": object_ids}, "user_id": user_id, "read": False},
+            {"$set": {"read": True, "read_at": datetime.utcnow()}}
+        )
+
 async def create_peer_review(reviewer_id: str, review: PeerReviewCreate):
     now = datetime.utcnow()
     doc = review.dict()
     doc["reviewer_id"] = reviewer_id # Stored for integrity, but not exposed in the API
     doc["created_at"] = now
     result = await db.peer_reviews.insert_one(doc)
+    await refresh_peer_review_summary(review.reviewee_id)
     return str(result.inserted_id)
 
 async def get_peer_reviews_for_employee(employee_id: str):
@@ -153,7 +554,69 @@ async def get_peer_reviews_for_employee(employee_id: str):
     async for r in db.peer_reviews.find({"reviewee_id": employee_id}).sort("created_at", -1):
         r["id"] = str(r["_id"])
         reviews.append(r)
-    return reviews
+
+    # Same k-anonymity rule as the summary: reviews from months with fewer than
+    # PEER_REVIEW_MIN_COUNT reviews lose their date and sentiment, get an id that
+    # carries no timestamp, and follow the rest in random order
+    per_period = Counter(r["created_at"].strftime("%Y-%m") for r in reviews)
+    dated, withheld = [], []
+    for r in reviews:
+        if per_period[r["created_at"].strftime("%Y-%m")] >= PEER_REVIEW_MIN_COUNT:
+            dated.append(r)
+        else:
+            r.update(id=uuid.uuid4().hex, created_at=None, sentiment=None)
+            withheld.append(r)
+    random.shuffle(withheld)
+    return dated + withheld
+
+# --- Peer review summary rollup ---
+# One document per reviewee (keyed by _id) holding sentiment counts per month,
+# rebuilt from the (reviewee_id, created_at) index whenever a review is written.
+async def refresh_peer_review_summary(reviewee_id: str):
+    await db.peer_reviews.aggregate([
+        {"$match": {"reviewee_id": reviewee_id}},
+        {"$group": {
+            "_id": {"period": {"$dateToString": {"format": "%Y-%m", "date": "$created_at"}}, "sentiment": "$sentiment"},
+            "count": {"$sum": 1},
+        }},
+        {"$group": {
+            "_id": "$_id.period",
+            "total": {"$sum": "$count"},
+            "sentiment": {"$push": {"k": "$_id.sentiment", "v": "$count"}},
+        }},
+        {"$sort": {"_id": 1}},
+        {"$group": {
+            "_id": reviewee_id,
+            "total": {"$sum": "$total"},
+            "periods": {"$push": {"period": "$_id", "total": "$total", "sentiment": {"$arrayToObject": "$sentiment"}}},
+        }},
+        {"$set": {"updated_at": "$$NOW"}},
+        {"$merge": {"into": "peer_review_summaries", "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]).to_list(None)
+
+async def get_peer_review_summary(reviewee_id: str):
+    summary = await db.peer_review_summaries.find_one({"_id": reviewee_id})
+    if summary is None and await db.peer_reviews.find_one({"reviewee_id": reviewee_id}, {"_id": 1}):
+        # Reviews written before the rollup existed
+        await refresh_peer_review_summary(reviewee_id)
+        summary = await db.peer_review_summaries.find_one({"_id": reviewee_id})
+    summary = summary or {"total": 0, "periods": []}
+
+    # k-anonymity: a month with only one or two reviews would let the reviewee
+    # match a sentiment to a reviewer, so small periods are only counted, and
+    # the overall sentiment totals cover the visible periods alone.
+    periods = [p for p in summary["periods"] if p["total"] >= PEER_REVIEW_MIN_COUNT]
+    sentiment = {}
+    for period in periods:
+        for value, count in period["sentiment"].items():
+            sentiment[value] = sentiment.get(value, 0) + count
+    return {
+        "total": summary["total"],
+        "sentiment": sentiment,
+        "periods": periods,
+        "suppressed": summary["total"] - sum(p["total"] for p in periods),
+        "min_count": PEER_REVIEW_MIN_COUNT,
+    }
 
 async def clear_all_notifications(user_id: str):
     await db.notifications.delete_many({"user_id": user_id})
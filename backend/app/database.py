@@ -1,12 +1,151 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import ASCENDING
+from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure, PyMongoError
+from .instrumentation import command_monitor
+import asyncio
 import os
+import time
 
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/feedback_system")
-client = AsyncIOMotorClient(MONGO_URL)
-db = client["feedback_system"]
+MONGO_DB = os.getenv("MONGO_DB", "feedback_system")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+NOTIFICATION_READ_TTL_DAYS = float(os.getenv("NOTIFICATION_READ_TTL_DAYS", "30"))
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", "86400"))
+# Readiness pings Mongo at most this often; probes in between reuse the result
+READINESS_CACHE_SECONDS = float(os.getenv("READINESS_CACHE_SECONDS", "2"))
+READINESS_TIMEOUT_SECONDS = float(os.getenv("READINESS_TIMEOUT_SECONDS", "1"))
+
+client = None
+_database = None
+_ready = False
+_last_ping = (0.0, False)  # (monotonic time, healthy)
+
+class _Database:
+    """Stands in for the Motor database so ``from .database import db`` works
+    at import time while the client itself is created in the app lifespan."""
+
+    def __getattr__(self, name):
+        if _database is None:
+            raise RuntimeError("MongoDB is not connected; call database.connect() first")
+        return getattr(_database, name)
+
+    def __getitem__(self, name):
+        return self.__getattr__(name)
+
+db = _Database()
+
+async def connect():
+    global client, _database
+    if client is not None:
+        return
+    client = AsyncIOMotorClient(
+        MONGO_URL,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        readPreference=MONGO_READ_PREFERENCE,
+        event_listeners=[command_monitor],
+    )
+    _database = client[MONGO_DB]
+
+async def warm_up():
+    # Concurrent pings each need their own socket, so this opens minPoolSize
+    # connections now rather than on the first requests after a deploy
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(max(1, MONGO_MIN_POOL_SIZE))))
+
+async def start():
+    """Connect, pre-warm the pool and build indexes concurrently."""
+    await connect()
+    await asyncio.gather(warm_up(), ensure_indexes())
+
+def mark_ready():
+    global _ready
+    _ready = True
+
+def close():
+    global client, _database, _ready
+    _ready = False
+    if client is not None:
+        client.close()
+    client = None
+    _database = None
+
+def is_ready() -> bool:
+    return _ready
+
+async def check_ready() -> bool:
+    """True when startup has finished and Mongo answered a recent ping."""
+    global _last_ping
+    if not _ready or client is None:
+        return False
+    checked_at, healthy = _last_ping
+    now = time.monotonic()
+    if now - checked_at < READINESS_CACHE_SECONDS:
+        return healthy
+    try:
+        await asyncio.wait_for(client.admin.command("ping"), READINESS_TIMEOUT_SECONDS)
+        healthy = True
+    except (PyMongoError, asyncio.TimeoutError):
+        healthy = False
+    _last_ping = (now, healthy)
+    return healthy
 
 async def ensure_indexes():
     await db.users.create_index([("username", ASCENDING)], unique=True)
-    await db.feedbacks.create_index([("employee_id", ASCENDING)])
-    await db.feedbacks.create_index([("manager_id", ASCENDING)]) 
\ No newline at end of file
+    # Multikey index for the reverse employee -> manager lookup and peer checks
+    await db.users.create_index([("team", ASCENDING), ("role", ASCENDING)])
+    # Serve the keyset-paginated, newest-first listings straight from the index
+    await db.feedbacks.create_index([("employee_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)])
+    await db.feedbacks.create_index([("manager_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)])
+    # The single-field owner indexes from older deployments are prefixes of the
+    # compound ones above and only cost writes now
+    existing = await db.feedbacks.index_information()
+    for name in ("employee_id_1", "manager_id_1"):
+        if name in existing:
+            try:
+                await db.feedbacks.drop_index(name)
+            except OperationFailure:
+                pass  # another worker dropped it first
+    # Full-text search; a collection allows only one text index, so role
+    # scoping is an extra equality filter on top of it
+    await db.feedbacks.create_index(
+        [("strengths", TEXT), ("areas_to_improve", TEXT), ("employee_comment", TEXT), ("tags", TEXT)],
+        name="feedback_text",
+        weights={"tags": 3, "strengths": 2, "areas_to_improve": 2, "employee_comment": 1}
+    )
+    # Backs both the per-user notification list and the unread count
+    await db.notifications.create_index([("user_id", ASCENDING), ("read", ASCENDING), ("created_at", DESCENDING)])
+    # Paginated newest-first list and the per-user cap trim
+    await db.notifications.create_index([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)])
+    # Read notifications expire NOTIFICATION_READ_TTL_DAYS after being read
+    await db.notifications.create_index(
+        [("read_at", ASCENDING)],
+        expireAfterSeconds=int(NOTIFICATION_READ_TTL_DAYS * 86400),
+        partialFilterExpression={"read": True}
+    )
+    # One coalesced notification per (user, key); plain notifications have no key
+    await db.notifications.create_index(
+        [("user_id", ASCENDING), ("coalesce_key", ASCENDING)],
+        unique=True,
+        partialFilterExpression={"coalesce_key": {"$exists": True}}
+    )
+    # Replayed Idempotency-Keys are remembered for IDEMPOTENCY_KEY_TTL_SECONDS
+    await db.idempotency_keys.create_index([("created_at", ASCENDING)], expireAfterSeconds=IDEMPOTENCY_KEY_TTL_SECONDS)
+    # Per-reviewee listing and the summary rebuild pipeline
+    await db.peer_reviews.create_index([("reviewee_id", ASCENDING), ("created_at", DESCENDING)])
+    # Rollup counters: upsert key for incremental updates, manager_id prefix for reads
+    await db.feedback_stats.create_index(
+        [("manager_id", ASCENDING), ("employee_id", ASCENDING), ("period", ASCENDING), ("kind", ASCENDING), ("value", ASCENDING)],
+        unique=True
+    )
\ No newline at end of file
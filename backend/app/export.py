@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from fpdf import FPDF
+import asyncio
+import os
+import tempfile
+
+PDF_EXPORT_WORKERS = int(os.getenv("PDF_EXPORT_WORKERS", "2"))
+PDF_EXPORT_BATCH_SIZE = int(os.getenv("PDF_EXPORT_BATCH_SIZE", "500"))
+CHUNK_SIZE = 64 * 1024
+
+# FPDF is pure Python and CPU bound, so rendering runs here instead of on the event loop
+_executor = ThreadPoolExecutor(max_workers=PDF_EXPORT_WORKERS, thread_name_prefix="pdf-export")
+
+def _new_document():
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(200, 10, txt="Feedback Report", ln=True, align="C")
+    pdf.set_font("Arial", size=12)
+    return pdf
+
+def _render_batch(pdf, feedbacks):
+    for fb in feedbacks:
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(200, 10, txt=f"Feedback from {fb.get('manager_name', 'N/A')} to {fb.get('employee_name', 'N/A')}", ln=True)
+        pdf.set_font("Arial", size=11)
+        pdf.cell(200, 8, txt=f"Date: {fb['created_at'].isoformat() if isinstance(fb['created_at'], datetime) else fb['created_at']}", ln=True)
+        pdf.cell(200, 8, txt=f"Strengths: {fb.get('strengths', '')}", ln=True)
+        pdf.cell(200, 8, txt=f"Areas to Improve: {fb.get('areas_to_improve', '')}", ln=True)
+        pdf.cell(200, 8, txt=f"Sentiment: {fb.get('sentiment', '')}", ln=True)
+        if fb.get('employee_comment'):
+            pdf.cell(200, 8, txt=f"Employee Comment: {fb.get('employee_comment')}", ln=True)
+        pdf.ln(5) # Add a small space
+
+def _write_document(pdf):
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    try:
+        pdf.output(path)
+    except Exception:
+        remove_file(path)
+        raise
+    return path
+
+def remove_file(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+async def single_batch(feedbacks):
+    yield feedbacks
+
+async def render_feedback_pdf(batches) -> str:
+    """Render an async iterable of feedback batches to a temporary PDF file and return its path."""
+    loop = asyncio.get_running_loop()
+    pdf = await loop.run_in_executor(_executor, _new_document)
+    async for batch in batches:
+        await loop.run_in_executor(_executor, _render_batch, pdf, batch)
+    return await loop.run_in_executor(_executor, _write_document, pdf)
+
+def _iter_file(f, path: str, cleanup: bool):
+    try:
+        with f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        if cleanup:
+            remove_file(path)
+
+def pdf_response(path: str, filename: str, cleanup: bool = True, etag: str = None):
+    """Stream a rendered PDF; temporary files are removed once the body is sent or the client goes away."""
+    # Open before responding so a cache eviction can't pull the file out from under us
+    f = open(path, "rb")
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Content-Length": str(os.fstat(f.fileno()).st_size),
+    }
+    if etag:
+        headers["ETag"] = etag
+        headers["Cache-Control"] = "private, no-cache"
+    return StreamingResponse(
+        _iter_file(f, path, cleanup),
+        media_type="application/pdf",
+        headers=headers,
+        background=BackgroundTask(remove_file, path) if cleanup else None,
+    )
@@ -0,0 +1,145 @@
+from collections import defaultdict
+from pymongo import monitoring
+import contextvars
+import logging
+import os
+import threading
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+
+logger = logging.getLogger(__name__)
+
+class RequestDbStats:
+    """Mongo work done on behalf of one HTTP request.
+
+    A request's concurrent queries finish on different Motor threads, so
+    updates go through record() under a lock.
+    """
+
+    __slots__ = ("commands", "duration_ms", "documents", "_lock")
+
+    def __init__(self):
+        self.commands = 0
+        self.duration_ms = 0.0
+        self.documents = 0
+        self._lock = threading.Lock()
+
+    def record(self, duration_ms: float, documents: int):
+        with self._lock:
+            self.commands += 1
+            self.duration_ms += duration_ms
+            self.documents += documents
+
+# Motor copies the caller's context into its executor threads, so the
+# listener below sees the stats object of the request that issued the command
+current_request_stats = contextvars.ContextVar("current_request_stats", default=None)
+
+class Metrics:
+    """Process-wide counters rendered by /metrics; updated from Motor's worker threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.commands = defaultdict(int)
+        self.command_seconds = defaultdict(float)
+        self.documents = 0
+        self.slow_commands = 0
+        self.requests = defaultdict(int)
+        self.request_seconds = 0.0
+        self.request_db_commands = 0
+
+    def record_command(self, name: str, duration_ms: float, documents: int, slow: bool):
+        with self._lock:
+            self.commands[name] += 1
+            self.command_seconds[name] += duration_ms / 1000
+            self.documents += documents
+            if slow:
+                self.slow_commands += 1
+
+    def record_request(self, status_code: int, seconds: float, stats: RequestDbStats):
+        with self._lock:
+            self.requests[status_code] += 1
+            self.request_seconds += seconds
+            self.request_db_commands += stats.commands
+
+metrics = Metrics()
+
+def filter_shape(value):
+    """Strip literal values from a query so it can be logged without user data."""
+    if isinstance(value, dict):
+        return {k: filter_shape(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [filter_shape(v) for v in value[:3]] + (["..."] if len(value) > 3 else [])
+    return type(value).__name__
+
+def _returned_documents(reply) -> int:
+    cursor = reply.get("cursor") if isinstance(reply, dict) else None
+    if not cursor:
+        return 0
+    return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+
+class CommandMonitor(monitoring.CommandListener):
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        command = event.command
+        query = command.get("filter", command.get("query", command.get("pipeline")))
+        self._pending[(event.connection_id, event.request_id)] = (command.get(event.command_name), query)
+
+    def succeeded(self, event):
+        self._finish(event, _returned_documents(event.reply))
+
+    def failed(self, event):
+        self._finish(event, 0)
+
+    def _finish(self, event, documents: int):
+        collection, query = self._pending.pop((event.connection_id, event.request_id), (None, None))
+        duration_ms = event.duration_micros / 1000
+        slow = duration_ms >= SLOW_QUERY_MS
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.record(duration_ms, documents)
+        metrics.record_command(event.command_name, duration_ms, documents, slow)
+        if slow:
+            logger.warning(
+                "slow query command=%s collection=%s duration_ms=%.1f filter=%s",
+                event.command_name, collection, duration_ms, filter_shape(query),
+            )
+
+command_monitor = CommandMonitor()
+
+def server_timing(stats: RequestDbStats, total_ms: float) -> str:
+    return (
+        f'db;dur={stats.duration_ms:.1f};desc="{stats.commands} queries, {stats.documents} docs", '
+        f"total;dur={total_ms:.1f}"
+    )
+
+def render_metrics(extra_gauges=None) -> str:
+    """Prometheus text exposition of the process-wide counters."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+    with metrics._lock:
+        metric("app_http_requests_total", "counter", "HTTP requests handled, by status code",
+               [({"status": code}, count) for code, count in sorted(metrics.requests.items())])
+        metric("app_http_request_seconds_total", "counter", "Total time spent handling HTTP requests",
+               [({}, round(metrics.request_seconds, 6))])
+        metric("app_http_request_db_commands_total", "counter", "Mongo commands issued by HTTP requests",
+               [({}, metrics.request_db_commands)])
+        metric("app_db_commands_total", "counter", "Mongo commands, by command name",
+               [({"command": name}, count) for name, count in sorted(metrics.commands.items())])
+        metric("app_db_command_seconds_total", "counter", "Time spent in Mongo commands, by command name",
+               [({"command": name}, round(sec, 6)) for name, sec in sorted(metrics.command_seconds.items())])
+        metric("app_db_documents_returned_total", "counter", "Documents returned by Mongo cursors",
+               [({}, metrics.documents)])
+        metric("app_db_slow_commands_total", "counter", f"Mongo commands slower than {SLOW_QUERY_MS:g} ms",
+               [({}, metrics.slow_commands)])
+    for name, (kind, help_text, value) in (extra_gauges or {}).items():
+        metric(name, kind, help_text, [({}, value)])
+    return "\n".join(lines) + "\n"
@@ -1,17 +1,40 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request, Form
+from fastapi import FastAPI, Depends, HTTPException, status, Request, Form, Query, Response, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.responses import FileResponse
-from . import database, models, schemas, auth, crud, dependencies, notifications
-from datetime import timedelta, datetime
+from . import database, models, schemas, auth, crud, dependencies, notifications, export
+from .pdf_cache import pdf_cache, cache_key
+from .cache import user_cache
+from .pubsub import broker, event_stream
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from fastapi.encoders import jsonable_encoder
+from .instrumentation import RequestDbStats, current_request_stats, metrics, server_timing, render_metrics
+from contextlib import asynccontextmanager
 from bson import ObjectId
 import os
-import tempfile
-from fpdf import FPDF
-from typing import List
-import markdown2
+import time
+import json
+import hashlib
+import asyncio
+import logging
+from typing import List, Optional
 
-app = FastAPI()
+logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s %(message)s")
+logging.getLogger("app").setLevel(os.getenv("LOG_LEVEL", "WARNING").upper())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await database.start()
+    await crud.ensure_feedback_stats()
+    await broker.start()
+    await notifications.start()
+    database.mark_ready()
+    yield
+    # Flush queued notifications while Mongo and the broker are still up
+    await notifications.stop()
+    await broker.stop()
+    database.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS for frontend
 app.add_middleware(
@@ -20,11 +43,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", "ETag"],
 )
 
-@app.on_event("startup")
-async def startup():
-    await database.ensure_indexes()
+# Count the Mongo work each request does and report it in Server-Timing
+@app.middleware("http")
+async def db_instrumentation(request: Request, call_next):
+    stats = RequestDbStats()
+    token = current_request_stats.set(stats)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        current_request_stats.reset(token)
+    elapsed = time.perf_counter() - start
+    response.headers["Server-Timing"] = server_timing(stats, elapsed * 1000)
+    metrics.record_request(response.status_code, elapsed, stats)
+    return response
+
+
+# --- Readiness: indexes built and connection pool warmed ---
+@app.get("/api/ready")
+async def readiness():
+    if not database.is_ready():
+        raise HTTPException(status_code=503, detail="Not started or shutting down")
+    if not await database.check_ready():
+        raise HTTPException(status_code=503, detail="MongoDB unreachable")
+    return {"status": "ready"}
 
 # --- Auth ---
 @app.post("/api/token", response_model=schemas.Token)
@@ -43,7 +88,7 @@ async def register(user: models.UserCreate):
     existing = await auth.get_user(user.username)
     if existing:
         raise HTTPException(status_code=400, detail="Username already registered")
-    hashed_pw = auth.get_password_hash(user.password)
+    hashed_pw = await auth.get_password_hash(user.password)
     user_id = await crud.create_user(user, hashed_pw)
     return schemas.UserOut(id=user_id, username=user.username, full_name=user.full_name, role=user.role)
 
@@ -57,6 +102,25 @@ async def get_me(current_user=Depends(auth.get_current_active_user)):
         role=current_user.role
     )
 
+# --- Prometheus Metrics ---
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    users = user_cache.stats()
+    return render_metrics({
+        "app_user_cache_hits_total": ("counter", "User cache hits", users["hits"]),
+        "app_user_cache_misses_total": ("counter", "User cache misses", users["misses"]),
+        "app_user_cache_evictions_total": ("counter", "User cache LRU evictions", users["evictions"]),
+        "app_user_cache_size": ("gauge", "Users currently cached", users["size"]),
+        "app_sse_subscribers": ("gauge", "Connected notification streams", broker.subscriber_count()),
+        "app_notification_queue_pending": ("gauge", "Notifications waiting to be written", notifications.queue.pending()),
+        "app_notification_dropped_total": ("counter", "Notifications dropped after exhausting retries", notifications.queue.dropped),
+    })
+
+# --- Cache Statistics ---
+@app.get("/api/cache/stats")
+async def cache_stats(current_user=Depends(auth.get_current_active_user)):
+    return {"users": user_cache.stats()}
+
 def convert_objectid(obj):
     if isinstance(obj, list):
         return [convert_objectid(item) for item in obj]
@@ -67,20 +131,43 @@ def convert_objectid(obj):
     else:
         return obj
 
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+def etag_json_response(request: Request, content, headers: dict = None):
+    # ETag is a hash of the body, so a client that already has it gets a 304
+    # and skips the download (and, in the frontend, the re-render)
+    body = json.dumps(jsonable_encoder(content), separators=(",", ":")).encode()
+    headers = {**(headers or {}), "ETag": f'"{hashlib.sha1(body).hexdigest()}"', "Cache-Control": "private, no-cache"}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
 # --- Manager: Get Team Members ---
+async def load_team(current_user):
+    members = await crud.get_users_by_ids(current_user.team or [])
+    team = [
+        {"id": emp["id"], "username": emp["username"], "full_name": emp["full_name"]}
+        for emp in members
+    ]
+    return convert_objectid(team)
+
 @app.get("/api/manager/team")
 async def get_team(current_user=Depends(dependencies.get_manager_user)):
-    team_ids = current_user.team or []
-    team = []
-    for eid in team_ids:
-        emp = await crud.get_user_by_id(eid)
-        if emp:
-            team.append({
-                "id": str(emp["id"]),
-                "username": emp["username"],
-                "full_name": emp["full_name"]
-            })
-    return convert_objectid(team)
+    return await load_team(current_user)
+
+# --- Manager: Team Feedback Statistics ---
+@app.get("/api/manager/stats")
+async def get_manager_stats(
+    since: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    current_user=Depends(dependencies.get_manager_user)
+):
+    return await crud.get_manager_stats(current_user.id, since)
 
 # --- Manager: Add Employee to Team ---
 @app.post("/api/manager/add_employee")
@@ -95,10 +182,43 @@ async def submit_feedback(feedback: models.FeedbackCreate, current_user=Depends(
     await notifications.notify_feedback(feedback.employee_id, "You have new feedback.")
     return fb_id
 
+# --- Manager: Submit Feedback for Many Employees ---
+MAX_BULK_FEEDBACK = 500
+
+@app.post("/api/feedback/bulk")
+async def submit_feedback_bulk(feedbacks: List[models.FeedbackCreate], current_user=Depends(dependencies.get_manager_user)):
+    if len(feedbacks) > MAX_BULK_FEEDBACK:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_FEEDBACK} feedbacks per request")
+    # One query covers every employee in the batch
+    team = set(current_user.team or [])
+    existing = {u["id"] for u in await crud.get_users_by_ids([fb.employee_id for fb in feedbacks if fb.employee_id in team])}
+    results = [None] * len(feedbacks)
+    valid = []
+    for i, fb in enumerate(feedbacks):
+        if fb.employee_id in existing:
+            valid.append(i)
+        else:
+            results[i] = {"index": i, "status": "error", "detail": "Employee is not in your team"}
+
+    outcomes = await crud.create_feedbacks(current_user.id, [feedbacks[i] for i in valid])
+    notified = []
+    for i, (fb_id, error) in zip(valid, outcomes):
+        if error:
+            results[i] = {"index": i, "status": "error", "detail": error}
+        else:
+            results[i] = {"index": i, "status": "created", "id": fb_id}
+            notified.append(feedbacks[i].employee_id)
+    await notifications.notify_many(notified, "You have new feedback.")
+    return {
+        "created": len(notified),
+        "failed": len(feedbacks) - len(notified),
+        "results": results,
+    }
+
 # --- Manager: Edit Feedback ---
 @app.put("/api/feedback/{feedback_id}")
 async def edit_feedback(feedback_id: str, update: models.FeedbackUpdate, current_user=Depends(dependencies.get_manager_user)):
-    fb = await crud.get_feedback_by_id(feedback_id)
+    fb = await crud.get_feedback_by_id(feedback_id, names=False)
     if not fb or fb["manager_id"] != current_user.id:
         raise HTTPException(status_code=404, detail="Feedback not found")
     # Always clear employee_comment and reset acknowledged
@@ -125,22 +245,35 @@ async def comment_feedback(
     comment: str = Form(...),
     current_user=Depends(dependencies.get_employee_user)
 ):
-    fb = await crud.get_feedback_by_id(feedback_id)
+    fb = await crud.get_feedback_by_id(feedback_id, names=False)
     if not fb or fb["employee_id"] != current_user.id:
         raise HTTPException(status_code=404, detail="Feedback not found")
     await crud.update_feedback(feedback_id, models.FeedbackUpdate(employee_comment=comment, acknowledged=True))
     return {"status": "commented"}
 
 # --- Employee: Request Feedback ---
+# A request within this long of the employee's previous one bumps its notification
+# instead of adding another
+FEEDBACK_REQUEST_WINDOW_SECONDS = int(os.getenv("FEEDBACK_REQUEST_WINDOW_SECONDS", "3600"))
+
 @app.post("/api/employee/request_feedback")
-async def request_feedback(current_user: models.User = Depends(dependencies.get_employee_user)):
+async def request_feedback(
+    idempotency_key: Optional[str] = Header(None, max_length=200),
+    current_user: models.User = Depends(dependencies.get_employee_user)
+):
     manager = await crud.get_manager_for_employee(current_user.id)
     if not manager:
         raise HTTPException(status_code=400, detail="Could not find an assigned manager for your account. Please contact an admin.")
-    
-    await notifications.notify_feedback(
-        manager["id"], 
-        f"Feedback request from {current_user.full_name}."
+
+    # A retried or double-submitted request replays the first response
+    if idempotency_key and not await crud.claim_idempotency_key(current_user.id, idempotency_key):
+        return {"status": "requested"}
+
+    await notifications.notify_coalesced(
+        manager["id"],
+        f"Feedback request from {current_user.full_name}.",
+        f"feedback_request:{current_user.id}",
+        FEEDBACK_REQUEST_WINDOW_SECONDS
     )
     return {"status": "requested"}
 
@@ -154,8 +287,7 @@ async def get_peers(current_user: models.User = Depends(dependencies.get_employe
 @app.post("/api/employee/peer_review")
 async def submit_peer_review(review: models.PeerReviewCreate, current_user: models.User = Depends(dependencies.get_employee_user)):
     # Ensure the person being reviewed is a valid peer
-    peers = await crud.get_peers_for_employee(current_user.id)
-    if review.reviewee_id not in [p["id"] for p in peers]:
+    if not await crud.are_peers(current_user.id, review.reviewee_id):
         raise HTTPException(status_code=403, detail="You can only review members of your own team.")
     
     review_id = await crud.create_peer_review(current_user.id, review)
@@ -170,43 +302,160 @@ async def submit_peer_review(review: models.PeerReviewCreate, current_user: mode
 async def get_my_peer_reviews(current_user: models.User = Depends(dependencies.get_employee_user)):
     reviews = await crud.get_peer_reviews_for_employee(current_user.id)
     for r in reviews:
-        r["created_at"] = r["created_at"].isoformat()
+        if r["created_at"]:
+            r["created_at"] = r["created_at"].isoformat()
     return reviews
 
+# --- Employee: Peer Review Summary ---
+@app.get("/api/employee/peer_reviews/summary")
+async def get_my_peer_review_summary(current_user: models.User = Depends(dependencies.get_employee_user)):
+    return await crud.get_peer_review_summary(current_user.id)
+
 # --- Get Feedbacks (Employee or Manager) ---
+def serialize_feedback(fb):
+    fb["id"] = str(fb["_id"])
+    if "employee_id" in fb:
+        fb["employee_id"] = str(fb["employee_id"])
+    if "manager_id" in fb:
+        fb["manager_id"] = str(fb["manager_id"])
+    if "created_at" in fb:
+        fb["created_at"] = fb["created_at"].isoformat()
+    if "updated_at" in fb:
+        fb["updated_at"] = fb["updated_at"].isoformat()
+    # Serve the HTML stored alongside the comment instead of re-rendering per request
+    html = fb.pop("employee_comment_html", None)
+    fb.pop("employee_comment_html_version", None)
+    if fb.get("employee_comment"):
+        fb["employee_comment"] = html
+    return fb
+
+async def load_feedback_page(current_user, limit: int, after: Optional[str] = None, fields: Optional[str] = None):
+    """Return one serialized page of the caller's feedback and the cursor for the next page."""
+    field_list = None
+    if fields:
+        field_list = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = set(field_list) - crud.FEEDBACK_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    try:
+        if current_user.role == "manager":
+            feedbacks = await crud.get_feedbacks_for_manager(current_user.id, limit=limit, after=after, fields=field_list)
+        else:
+            feedbacks = await crud.get_feedbacks_for_employee(current_user.id, limit=limit, after=after, fields=field_list)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    next_cursor = crud.page_cursor(feedbacks[-1]) if len(feedbacks) == limit else None
+    return convert_objectid([serialize_feedback(fb) for fb in feedbacks]), next_cursor
+
 @app.get("/api/feedbacks")
-async def get_feedbacks(current_user=Depends(auth.get_current_active_user)):
-    if current_user.role == "manager":
-        feedbacks = await crud.get_feedbacks_for_manager(current_user.id)
-    else:
-        feedbacks = await crud.get_feedbacks_for_employee(current_user.id)
-    for fb in feedbacks:
-        fb["id"] = str(fb["_id"])
-        if "employee_id" in fb:
-            fb["employee_id"] = str(fb["employee_id"])
-        if "manager_id" in fb:
-            fb["manager_id"] = str(fb["manager_id"])
-        if "created_at" in fb:
-            fb["created_at"] = fb["created_at"].isoformat()
-        if "updated_at" in fb:
-            fb["updated_at"] = fb["updated_at"].isoformat()
-        if fb.get("employee_comment"):
-            fb["employee_comment"] = markdown2.markdown(fb["employee_comment"])
-    return convert_objectid(feedbacks)
+async def get_feedbacks(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_user=Depends(auth.get_current_active_user)
+):
+    feedbacks, next_cursor = await load_feedback_page(current_user, limit, after, fields)
+    return etag_json_response(request, feedbacks, {"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+# --- Get One Feedback (the manager who wrote it or the employee it's for) ---
+async def load_visible_feedback(feedback_id: str, current_user, names: bool = True):
+    fb = await crud.get_feedback_by_id(feedback_id, names=names)
+
+    # Security check
+    if not fb or (current_user.role == 'employee' and fb['employee_id'] != current_user.id) or \
+       (current_user.role == 'manager' and fb['manager_id'] != current_user.id):
+        raise HTTPException(status_code=404, detail="Feedback not found or access denied")
+    return fb
+
+@app.get("/api/feedback/{feedback_id}")
+async def get_feedback(request: Request, feedback_id: str, current_user: models.User = Depends(auth.get_current_active_user)):
+    # One _id lookup; names are left out since callers already know both parties
+    fb = await load_visible_feedback(feedback_id, current_user, names=False)
+    return etag_json_response(request, convert_objectid(serialize_feedback(fb)))
+
+# --- Search Feedbacks (scoped like /api/feedbacks) ---
+@app.get("/api/feedbacks/search")
+async def search_feedbacks(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    after: Optional[str] = None,
+    current_user=Depends(auth.get_current_active_user)
+):
+    owner_field = "manager_id" if current_user.role == "manager" else "employee_id"
+    try:
+        feedbacks = await crud.search_feedbacks(owner_field, current_user.id, q, limit=limit, after=after)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    headers = {"X-Next-Cursor": crud.search_cursor(feedbacks[-1])} if len(feedbacks) == limit else None
+    return etag_json_response(request, convert_objectid([serialize_feedback(fb) for fb in feedbacks]), headers)
+
+# --- Dashboard: everything one page render needs, in one round-trip ---
+@app.get("/api/dashboard")
+async def get_dashboard(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    after: Optional[str] = None,
+    current_user=Depends(auth.get_current_active_user)
+):
+    is_manager = current_user.role == "manager"
+    (feedbacks, next_cursor), unread_count, team, stats = await asyncio.gather(
+        load_feedback_page(current_user, limit, after),
+        crud.count_unread_notifications(current_user.id),
+        load_team(current_user) if is_manager else asyncio.sleep(0, result=None),
+        crud.get_manager_stats(current_user.id) if is_manager else asyncio.sleep(0, result=None),
+    )
+    return etag_json_response(request, {
+        "user": schemas.UserOut(
+            id=current_user.id,
+            username=current_user.username,
+            full_name=current_user.full_name,
+            role=current_user.role
+        ),
+        "feedbacks": feedbacks,
+        "next_cursor": next_cursor,
+        "unread_count": unread_count,
+        "team": team,
+        "stats": stats,
+    })
 
 # --- Get Notifications ---
 @app.get("/api/notifications")
-async def get_notifications(current_user=Depends(auth.get_current_active_user)):
-    notes = await crud.get_notifications(current_user.id)
-    # Mark all unread notifications as read
+async def get_notifications(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    after: Optional[str] = None,
+    current_user=Depends(auth.get_current_active_user)
+):
+    try:
+        notes = await crud.get_notifications(current_user.id, limit=limit, after=after)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    headers = {"X-Next-Cursor": crud.page_cursor(notes[-1])} if len(notes) == limit else None
+    # Mark this page's unread notifications as read
     unread_ids = [n["id"] for n in notes if not n.get("read")]
-    for nid in unread_ids:
-        await crud.mark_notification_read(nid)
+    await crud.mark_notifications_read(current_user.id, unread_ids)
     for n in notes:
         n["id"] = str(n["_id"])
         if "created_at" in n:
             n["created_at"] = n["created_at"].isoformat()
-    return convert_objectid(notes)
+        if n.get("read_at"):
+            n["read_at"] = n["read_at"].isoformat()
+    return etag_json_response(request, convert_objectid(notes), headers)
+
+# --- Real-time Notifications (Server-Sent Events) ---
+@app.get("/api/notifications/stream")
+async def stream_notifications(request: Request, current_user=Depends(auth.get_current_active_user)):
+    return StreamingResponse(
+        event_stream(
+            current_user.id,
+            request.is_disconnected,
+            lambda: crud.count_unread_notifications(current_user.id),
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # --- Mark Notification as Read ---
 @app.post("/api/notifications/{notification_id}/read")
@@ -224,44 +473,29 @@ async def unread_notification_count(current_user=Depends(auth.get_current_active
     count = await crud.count_unread_notifications(current_user.id)
     return {"unread_count": count}
 
-def create_feedback_pdf(feedbacks, filename="feedbacks.pdf"):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(200, 10, txt="Feedback Report", ln=True, align="C")
-    pdf.set_font("Arial", size=12)
-
-    for fb in feedbacks:
-        pdf.set_font("Arial", "B", 12)
-        pdf.cell(200, 10, txt=f"Feedback from {fb.get('manager_name', 'N/A')} to {fb.get('employee_name', 'N/A')}", ln=True)
-        pdf.set_font("Arial", size=11)
-        pdf.cell(200, 8, txt=f"Date: {fb['created_at'].isoformat() if isinstance(fb['created_at'], datetime) else fb['created_at']}", ln=True)
-        pdf.cell(200, 8, txt=f"Strengths: {fb.get('strengths', '')}", ln=True)
-        pdf.cell(200, 8, txt=f"Areas to Improve: {fb.get('areas_to_improve', '')}", ln=True)
-        pdf.cell(200, 8, txt=f"Sentiment: {fb.get('sentiment', '')}", ln=True)
-        if fb.get('employee_comment'):
-            pdf.cell(200, 8, txt=f"Employee Comment: {fb.get('employee_comment')}", ln=True)
-        pdf.ln(5) # Add a small space
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        pdf.output(tmp.name)
-        return FileResponse(tmp.name, filename=filename, media_type="application/pdf")
+async def cached_pdf_response(request: Request, versions, batches, filename: str):
+    key = cache_key(versions)
+    etag = f'"{key}"'
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    path = pdf_cache.get(key)
+    if path is None:
+        rendered = await export.render_feedback_pdf(batches)
+        path = pdf_cache.put(key, rendered, [feedback_id for feedback_id, _ in versions])
+        if path is None:
+            # Too large to cache; stream the temporary render and discard it
+            return export.pdf_response(rendered, filename=filename, etag=etag)
+    return export.pdf_response(path, filename=filename, cleanup=False, etag=etag)
 
 @app.get("/api/feedbacks/export")
-async def export_feedbacks_history(current_user: models.User = Depends(auth.get_current_active_user)):
-    if current_user.role == "manager":
-        feedbacks = await crud.get_feedbacks_for_manager(current_user.id)
-    else:
-        feedbacks = await crud.get_feedbacks_for_employee(current_user.id)
-    return create_feedback_pdf(feedbacks, filename="feedback_history.pdf")
+async def export_feedbacks_history(request: Request, current_user: models.User = Depends(auth.get_current_active_user)):
+    owner_field = "manager_id" if current_user.role == "manager" else "employee_id"
+    versions = await crud.get_feedback_versions(owner_field, current_user.id)
+    batches = crud.iter_feedback_batches(owner_field, current_user.id, batch_size=export.PDF_EXPORT_BATCH_SIZE)
+    return await cached_pdf_response(request, versions, batches, filename="feedback_history.pdf")
 
 @app.get("/api/feedback/{feedback_id}/export")
-async def export_single_feedback(feedback_id: str, current_user: models.User = Depends(auth.get_current_active_user)):
-    fb = await crud.get_feedback_by_id(feedback_id)
-
-    # Security check
-    if not fb or (current_user.role == 'employee' and fb['employee_id'] != current_user.id) or \
-       (current_user.role == 'manager' and fb['manager_id'] != current_user.id):
-        raise HTTPException(status_code=404, detail="Feedback not found or access denied")
-
-    return create_feedback_pdf([fb], filename=f"feedback_{feedback_id}.pdf") 
\ No newline at end of file
+async def export_single_feedback(request: Request, feedback_id: str, current_user: models.User = Depends(auth.get_current_active_user)):
+    fb = await load_visible_feedback(feedback_id, current_user)
+    versions = [(fb["id"], fb.get("updated_at"))]
+    return await cached_pdf_response(request, versions, export.single_batch([fb]), filename=f"feedback_{feedback_id}.pdf")
\ No newline at end of file
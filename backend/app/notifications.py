@@ -1,4 +1,128 @@
-from .crud import create_notification
+from .crud import new_notification_doc, insert_notifications, create_coalesced_notification
+from datetime import datetime
+import asyncio
+import logging
+import os
+
+NOTIFICATION_WRITE_BEHIND = os.getenv("NOTIFICATION_WRITE_BEHIND", "1") == "1"
+NOTIFICATION_QUEUE_SIZE = int(os.getenv("NOTIFICATION_QUEUE_SIZE", "10000"))
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "200"))
+NOTIFICATION_FLUSH_MS = int(os.getenv("NOTIFICATION_FLUSH_MS", "50"))
+NOTIFICATION_MAX_RETRIES = int(os.getenv("NOTIFICATION_MAX_RETRIES", "5"))
+
+logger = logging.getLogger(__name__)
+
+class NotificationQueue:
+    """Write-behind buffer so request handlers don't wait on notification writes.
+
+    A single worker drains the queue, writing up to ``batch_size`` pending
+    notifications with one insert_many once the batch is full or
+    ``flush_ms`` has passed. Failed writes are retried with backoff, and
+    stop() flushes everything still queued. While the worker isn't running
+    (scripts, or before startup) writes happen inline.
+    """
+
+    def __init__(self, maxsize: int = NOTIFICATION_QUEUE_SIZE, batch_size: int = NOTIFICATION_BATCH_SIZE,
+                 flush_ms: int = NOTIFICATION_FLUSH_MS, max_retries: int = NOTIFICATION_MAX_RETRIES):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_seconds = flush_ms / 1000
+        self.max_retries = max_retries
+        self._queue = None
+        self._task = None
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self):
+        self._queue = asyncio.Queue(self.maxsize)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        # Sentinel goes in behind everything already queued, so this drains
+        await self._queue.put(None)
+        await task
+
+    async def put_docs(self, docs):
+        if not self.running:
+            await insert_notifications(docs)
+            return
+        for doc in docs:
+            # Blocks only when the queue is full, which pushes back on callers
+            await self._queue.put(doc)
+
+    async def put_coalesced(self, *args):
+        if not self.running:
+            await create_coalesced_notification(*args)
+            return
+        await self._queue.put(args)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        docs = [item for item in batch if isinstance(item, dict)]
+        if docs:
+            await self._with_retry(insert_notifications, docs)
+        for args in (item for item in batch if isinstance(item, tuple)):
+            await self._with_retry(create_coalesced_notification, *args)
+
+    async def _with_retry(self, write, *args):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await write(*args)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.dropped += 1
+                    logger.error("notification write failed, giving up after %d attempts error=%s", attempt + 1, e)
+                    return
+                logger.warning("notification write failed attempt=%d error=%s", attempt + 1, e)
+                await asyncio.sleep(min(0.1 * 2 ** attempt, 5))
+
+queue = NotificationQueue()
 
 async def notify_feedback(employee_id: str, message: str):
-    await create_notification(employee_id, message) 
\ No newline at end of file
+    await queue.put_docs([new_notification_doc(employee_id, message)])
+
+async def notify_many(user_ids, message: str):
+    now = datetime.utcnow()
+    await queue.put_docs([new_notification_doc(user_id, message, now) for user_id in dict.fromkeys(user_ids)])
+
+async def notify_coalesced(user_id: str, message: str, coalesce_key: str, window_seconds: int):
+    await queue.put_coalesced(user_id, message, coalesce_key, window_seconds)
+
+async def start():
+    if NOTIFICATION_WRITE_BEHIND:
+        await queue.start()
+
+async def stop():
+    await queue.stop()
\ No newline at end of file
@@ -0,0 +1,111 @@
+from collections import OrderedDict
+import hashlib
+import os
+import shutil
+import tempfile
+
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "feedback_pdf_cache"))
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Bump whenever export.py changes the PDF layout so stale renders are never served
+RENDER_VERSION = "1"
+
+def cache_key(versions) -> str:
+    """Content address for a PDF built from ``versions``: (feedback_id, updated_at) pairs in render order."""
+    digest = hashlib.sha256(RENDER_VERSION.encode())
+    for feedback_id, updated_at in versions:
+        digest.update(f"\n{feedback_id}:{updated_at.isoformat() if updated_at else ''}".encode())
+    return digest.hexdigest()
+
+class PdfCache:
+    """Size-bounded LRU of rendered PDFs on local disk, shared by every worker using the directory.
+
+    Entries are keyed by ``cache_key`` so edits naturally produce a new key;
+    ``invalidate_feedback`` just reclaims the space held by superseded renders.
+    The directory itself is the index: a hit refreshes the file's mtime, and
+    eviction removes the oldest files until the whole directory fits in
+    ``max_bytes``, so the bound holds across workers and any worker can serve
+    a sibling's render.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Only this worker's renders; enough to reclaim them early on edit
+        self._keys_by_feedback = {}
+        self._feedbacks_by_key = {}
+        os.makedirs(directory, exist_ok=True)
+        self._evict()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            os.utime(path)  # mark as recently used for every worker's eviction
+        except FileNotFoundError:
+            self._forget(key)
+            return None
+        return path
+
+    def put(self, key: str, rendered_path: str, feedback_ids):
+        """Move a freshly rendered file into the cache; returns the cached path, or None if it doesn't fit."""
+        size = os.path.getsize(rendered_path)
+        if size > self.max_bytes:
+            return None
+        path = self._path(key)
+        # Stage next to the target so the final rename is atomic and siblings never see a partial file
+        staged = f"{path}.{os.getpid()}.tmp"
+        shutil.move(rendered_path, staged)
+        os.replace(staged, path)
+        self._feedbacks_by_key[key] = list(feedback_ids)
+        for feedback_id in self._feedbacks_by_key[key]:
+            self._keys_by_feedback.setdefault(feedback_id, set()).add(key)
+        self._evict()
+        return path
+
+    def invalidate_feedback(self, feedback_id: str):
+        for key in list(self._keys_by_feedback.get(feedback_id, ())):
+            self._drop(key)
+
+    def clear(self):
+        for _, key, _ in self._scan():
+            self._drop(key)
+
+    def _scan(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pdf"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        return sorted(entries)
+
+    def _forget(self, key: str):
+        for feedback_id in self._feedbacks_by_key.pop(key, []):
+            keys = self._keys_by_feedback.get(feedback_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_feedback[feedback_id]
+
+    def _drop(self, key: str):
+        self._forget(key)
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        # Least recently used first, across every worker sharing the directory
+        entries = self._scan()
+        total = sum(size for _, _, size in entries)
+        for _, key, size in entries:
+            if total <= self.max_bytes:
+                break
+            self._drop(key)
+            total -= size
+
+pdf_cache = PdfCache(PDF_CACHE_DIR, PDF_CACHE_MAX_BYTES)
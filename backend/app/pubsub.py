@@ -0,0 +1,165 @@
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from pymongo.errors import PyMongoError
+from .database import db
+import asyncio
+import json
+import logging
+import os
+
+NOTIFICATION_BROKER = os.getenv("NOTIFICATION_BROKER", "memory")
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+logger = logging.getLogger(__name__)
+
+def notification_event(doc):
+    return {
+        "type": "notification",
+        "id": str(doc["_id"]),
+        "message": doc["message"],
+        "created_at": doc["created_at"].isoformat(),
+        "count": doc.get("count", 1),
+    }
+
+class Subscription:
+    """One connected client; a bounded queue so a slow reader can't grow memory without limit."""
+
+    def __init__(self, user_id: str, maxsize: int):
+        self.user_id = user_id
+        self.queue = asyncio.Queue(maxsize)
+
+    def offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Drop the backlog; the stream sends a fresh unread count instead
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync"})
+
+class NotificationBroker(ABC):
+    """Fans notifications out to the subscriptions held by this process."""
+
+    def __init__(self, queue_size: int = SSE_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, user_id: str) -> Subscription:
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+
+    def subscriber_count(self) -> int:
+        return sum(len(s) for s in self._subscriptions.values())
+
+    def dispatch(self, user_id: str, event):
+        for subscription in list(self._subscriptions.get(user_id, ())):
+            subscription.offer(event)
+
+    @abstractmethod
+    async def publish(self, user_id: str, event):
+        ...
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+class InProcessBroker(NotificationBroker):
+    """Delivers only to clients connected to this process; fine for a single worker."""
+
+    async def publish(self, user_id: str, event):
+        self.dispatch(user_id, event)
+
+class ChangeStreamBroker(NotificationBroker):
+    """Delivers notifications seen on a Mongo change stream, so every worker sees every notification.
+
+    One stream per process feeds all local subscribers; requires a replica set.
+    """
+
+    def __init__(self, collection_name: str, queue_size: int = SSE_QUEUE_SIZE):
+        super().__init__(queue_size)
+        self.collection_name = collection_name
+        self._task = None
+
+    async def publish(self, user_id: str, event):
+        # The insert itself reaches subscribers through the change stream
+        pass
+
+    async def start(self):
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _watch(self):
+        # Inserts, plus coalesced notifications being bumped or restarted
+        # (the only updates that move created_at)
+        pipeline = [{"$match": {"$or": [
+            {"operationType": "insert"},
+            {"operationType": "update", "updateDescription.updatedFields.created_at": {"$exists": True}},
+        ]}}]
+        while True:
+            try:
+                async with db[self.collection_name].watch(pipeline, full_document="updateLookup") as stream:
+                    async for change in stream:
+                        doc = change.get("fullDocument")
+                        if doc is None:
+                            continue
+                        if change["operationType"] == "insert":
+                            self.dispatch(doc["user_id"], notification_event(doc))
+                        else:
+                            self.dispatch(doc["user_id"], {"type": "resync"})
+            except PyMongoError as e:
+                logger.warning("notification change stream interrupted error=%s", e)
+                await asyncio.sleep(1)
+
+def create_broker() -> NotificationBroker:
+    if NOTIFICATION_BROKER == "changestream":
+        return ChangeStreamBroker("notifications")
+    return InProcessBroker()
+
+broker = create_broker()
+
+def format_sse(event) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+async def event_stream(user_id: str, is_disconnected, unread_count, heartbeat: float = SSE_HEARTBEAT_SECONDS):
+    """Subscribe ``user_id`` and yield SSE frames until the client goes away.
+
+    Subscribing happens here, next to the try/finally that unsubscribes, so a
+    response torn down before its first iteration leaves nothing behind.
+
+    ``unread_count`` is awaited once on connect and again only after an
+    overflow, never per tick, so idle connections cost no Mongo queries.
+    """
+    subscription = broker.subscribe(user_id)
+    try:
+        yield format_sse({"type": "unread_count", "unread_count": await unread_count()})
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            if event["type"] == "resync":
+                event = {"type": "unread_count", "unread_count": await unread_count()}
+            yield format_sse(event)
+    finally:
+        broker.unsubscribe(subscription)
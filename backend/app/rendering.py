@@ -0,0 +1,8 @@
+import markdown2
+
+# Bump when the Markdown renderer or its options change; stored HTML with an
+# older version is re-rendered lazily the next time it is read
+MARKDOWN_RENDER_VERSION = 1
+
+def render_markdown(text: str) -> str:
+    return markdown2.markdown(text)
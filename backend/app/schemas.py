@@ -32,5 +32,5 @@ class PeerReviewOut(BaseModel):
     reviewee_id: str
     strengths: str
     areas_to_improve: str
-    sentiment: str
-    created_at: str 
\ No newline at end of file
+    sentiment: Optional[str]  # None when withheld for anonymity
+    created_at: Optional[str] 
\ No newline at end of file
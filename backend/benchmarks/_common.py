@@ -0,0 +1,134 @@
+"""Shared helpers for the backend benchmark scripts.
+
+Run the scripts from the ``backend`` directory against a local MongoDB, e.g.::
+
+    python -m benchmarks.bench_feedback_listing
+
+They write to the database named by ``BENCH_MONGO_DB`` (``feedback_bench``
+unless set) and drop it when they finish. The app's own ``MONGO_DB`` is
+ignored, and a database whose name doesn't contain "bench" is never dropped.
+"""
+import json
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from pymongo import monitoring
+
+BENCH_MONGO_DB = os.getenv("BENCH_MONGO_DB", "feedback_bench")
+if "bench" not in BENCH_MONGO_DB:
+    raise SystemExit(f"refusing to use BENCH_MONGO_DB={BENCH_MONGO_DB!r}: benchmark databases are dropped, so the name must contain 'bench'")
+# Overrides any MONGO_DB from the environment, which may name the real database
+os.environ["MONGO_DB"] = BENCH_MONGO_DB
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts Mongo commands so benchmarks can report round-trips."""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# Listeners only apply to clients created after registration, so this has
+# to happen before database.connect() runs.
+command_counter = CommandCounter()
+monitoring.register(command_counter)
+
+from app import database  # noqa: E402
+from app.database import db  # noqa: E402
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples_ms):
+    return {
+        "n": len(samples_ms),
+        "mean_ms": round(statistics.mean(samples_ms), 3) if samples_ms else 0.0,
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+    }
+
+
+async def timed(coro_fn, repeat):
+    """Await ``coro_fn()`` ``repeat`` times; return latencies and round-trips per call."""
+    samples = []
+    start_count = command_counter.count
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await coro_fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    round_trips = (command_counter.count - start_count) / repeat if repeat else 0
+    return samples, round_trips
+
+
+async def reset_database():
+    # Every benchmark starts here, so this is also where the client gets created
+    await database.connect()
+    if db.name != BENCH_MONGO_DB:
+        raise RuntimeError(f"refusing to drop {db.name!r}; benchmarks only drop {BENCH_MONGO_DB!r}")
+    await db.client.drop_database(db.name)
+
+
+async def seed_team(employees, manager_name="bench_manager"):
+    """Insert one manager with ``employees`` team members; return (manager_id, employee_ids)."""
+    result = await db.users.insert_many([
+        {
+            "username": f"{manager_name}_emp{i}",
+            "full_name": f"Employee {i}",
+            "hashed_password": "x",
+            "role": "employee",
+        }
+        for i in range(employees)
+    ])
+    employee_ids = [str(oid) for oid in result.inserted_ids]
+    manager = await db.users.insert_one({
+        "username": manager_name,
+        "full_name": "Bench Manager",
+        "hashed_password": "x",
+        "role": "manager",
+        "team": employee_ids,
+    })
+    return str(manager.inserted_id), employee_ids
+
+
+async def seed_feedbacks(manager_id, employee_ids, count):
+    now = datetime.utcnow()
+    sentiments = ["positive", "neutral", "negative"]
+    docs = []
+    for i in range(count):
+        created = now - timedelta(minutes=i)
+        docs.append({
+            "employee_id": employee_ids[i % len(employee_ids)],
+            "manager_id": manager_id,
+            "strengths": f"Strength note {i}",
+            "areas_to_improve": f"Improvement note {i}",
+            "sentiment": sentiments[i % len(sentiments)],
+            "tags": ["communication"] if i % 2 else ["leadership"],
+            "created_at": created,
+            "updated_at": created,
+            "acknowledged": False,
+            "employee_comment": None,
+        })
+    for start in range(0, len(docs), 1000):
+        await db.feedbacks.insert_many(docs[start:start + 1000])
+
+
+def report(name, results):
+    print(json.dumps({"benchmark": name, "results": results}, indent=2))
@@ -0,0 +1,66 @@
+"""Per-request cost of serving employee comments: render on read vs stored HTML.
+
+Pure CPU microbenchmark; no MongoDB needed. Each "request" serializes one
+page of feedback rows the way /api/feedbacks does.
+"""
+import argparse
+import time
+
+from ._common import report, summarize
+from app.main import serialize_feedback
+from app.rendering import render_markdown, MARKDOWN_RENDER_VERSION
+
+SAMPLE_COMMENT = """Thanks for the feedback! A few thoughts:
+
+* I agree on **communication**, I'll post weekly updates in the team channel.
+* On _code reviews_, could we pair on the next two so I see what you expect?
+
+See [the onboarding doc](https://example.com/onboarding) for the process we discussed.
+"""
+
+
+def make_page(rows, with_html):
+    page = []
+    for i in range(rows):
+        fb = {"_id": f"id{i}", "employee_comment": SAMPLE_COMMENT}
+        if with_html:
+            fb["employee_comment_html"] = render_markdown(SAMPLE_COMMENT)
+            fb["employee_comment_html_version"] = MARKDOWN_RENDER_VERSION
+        page.append(fb)
+    return page
+
+
+def render_on_read(page):
+    for fb in page:
+        fb = dict(fb)
+        fb["employee_comment"] = render_markdown(fb["employee_comment"])
+
+
+def serve_stored(page):
+    for fb in page:
+        serialize_feedback(dict(fb))
+
+
+def measure(fn, page, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(page)
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    report("comment_render", {
+        "rows_per_request": args.rows,
+        "render_on_read": measure(render_on_read, make_page(args.rows, False), args.repeat),
+        "stored_html": measure(serve_stored, make_page(args.rows, True), args.repeat),
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Latency curve for feedback listings as a manager's history grows.
+
+Name resolution is batched, so round-trips per call should stay flat while
+the feedback count grows; only the cursor's getMore batches scale with N.
+"""
+import argparse
+import asyncio
+
+from ._common import db, report, reset_database, seed_feedbacks, seed_team, summarize, timed
+from app import crud
+
+
+async def run(sizes, repeat, team_size):
+    results = []
+    for size in sizes:
+        await reset_database()
+        manager_id, employee_ids = await seed_team(team_size)
+        await seed_feedbacks(manager_id, employee_ids, size)
+        await db.feedbacks.create_index("manager_id")
+
+        samples, round_trips = await timed(lambda: crud.get_feedbacks_for_manager(manager_id), repeat)
+        results.append({"feedbacks": size, "round_trips": round_trips, **summarize(samples)})
+    await reset_database()
+    report("feedback_listing", results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 1000, 2000, 5000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--team-size", type=int, default=25)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeat, args.team_size))
+
+
+if __name__ == "__main__":
+    main()
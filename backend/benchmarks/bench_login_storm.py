@@ -0,0 +1,87 @@
+"""p99 latency of an unrelated endpoint while a storm of logins is running.
+
+Password hashing runs in a bounded thread pool, so /api/me should keep its
+latency while bcrypt work queues up behind PASSWORD_HASH_WORKERS threads.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from ._common import db, report, reset_database, summarize
+from app import auth
+from app.main import app
+
+PASSWORD = "benchpassword"
+
+
+async def login_storm(client, username, logins, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            resp = await client.post("/api/token", data={"username": username, "password": PASSWORD})
+            resp.raise_for_status()
+
+    await asyncio.gather(*(login() for _ in range(logins)))
+
+
+async def probe(client, headers, stop, samples):
+    while not stop.is_set():
+        start = time.perf_counter()
+        resp = await client.get("/api/me", headers=headers)
+        resp.raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def run(logins, concurrency):
+    await reset_database()
+    await db.users.insert_one({
+        "username": "storm_user",
+        "full_name": "Storm User",
+        "hashed_password": await auth.get_password_hash(PASSWORD),
+        "role": "employee",
+    })
+    headers = {"Authorization": f"Bearer {auth.create_access_token({'sub': 'storm_user'})}"}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        baseline = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, headers, stop, baseline))
+        await asyncio.sleep(1)
+        stop.set()
+        await task
+
+        during = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, headers, stop, during))
+        start = time.perf_counter()
+        await login_storm(client, "storm_user", logins, concurrency)
+        storm_seconds = time.perf_counter() - start
+        stop.set()
+        await task
+
+    await reset_database()
+    report("login_storm", {
+        "logins": logins,
+        "concurrency": concurrency,
+        "hash_workers": auth.PASSWORD_HASH_WORKERS,
+        "logins_per_second": round(logins / storm_seconds, 2),
+        "me_baseline": summarize(baseline),
+        "me_during_storm": summarize(during),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.logins, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
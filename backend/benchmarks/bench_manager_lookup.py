@@ -0,0 +1,69 @@
+"""Reverse manager lookup (crud.get_manager_for_employee) as the user collection grows.
+
+Seeds managers with fixed-size teams up to 100k users and times the lookup
+with and without the multikey team index, reporting the winning plan.
+"""
+import argparse
+import asyncio
+
+from ._common import db, report, reset_database, summarize, timed
+from app import crud, database
+
+TEAM_SIZE = 10
+
+
+async def seed_users(total):
+    managers = total // (TEAM_SIZE + 1)
+    employee_ids = []
+    for m in range(managers):
+        employees = [
+            {"username": f"m{m}_e{e}", "full_name": f"Employee {m}.{e}", "hashed_password": "x", "role": "employee"}
+            for e in range(TEAM_SIZE)
+        ]
+        result = await db.users.insert_many(employees)
+        team = [str(oid) for oid in result.inserted_ids]
+        employee_ids.extend(team)
+        await db.users.insert_one(
+            {"username": f"m{m}", "full_name": f"Manager {m}", "hashed_password": "x", "role": "manager", "team": team}
+        )
+    return employee_ids
+
+
+def winning_stage(plan):
+    stage = plan["queryPlanner"]["winningPlan"]
+    while "inputStage" in stage:
+        stage = stage["inputStage"]
+    return stage["stage"]
+
+
+async def measure(employee_ids, repeat):
+    targets = employee_ids[::max(1, len(employee_ids) // repeat)][:repeat]
+    iterator = iter(targets)
+    samples, _ = await timed(lambda: crud.get_manager_for_employee(next(iterator)), len(targets))
+    plan = await db.users.find({"role": "manager", "team": targets[0]}).explain()
+    return {"plan": winning_stage(plan), **summarize(samples)}
+
+
+async def run(sizes, repeat):
+    results = []
+    for size in sizes:
+        await reset_database()
+        employee_ids = await seed_users(size)
+        without_index = await measure(employee_ids, repeat)
+        await database.ensure_indexes()
+        with_index = await measure(employee_ids, repeat)
+        results.append({"users": size, "without_index": without_index, "with_index": with_index})
+    await reset_database()
+    report("manager_lookup", results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
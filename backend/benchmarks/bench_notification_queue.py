@@ -0,0 +1,83 @@
+"""Latency of notifying write endpoints with inline vs write-behind notifications.
+
+Submits feedback through POST /api/feedback (which notifies the employee)
+first with notification writes inline, then with the NotificationQueue
+worker running, and reports request latency for both plus how long the
+queue took to drain the backlog afterwards.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from ._common import command_counter, db, report, reset_database, seed_team, summarize
+from app import auth, notifications
+from app.main import app
+
+
+async def submit_all(client, headers, employee_ids, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def submit(i):
+        async with semaphore:
+            start = time.perf_counter()
+            resp = await client.post("/api/feedback", headers=headers, json={
+                "employee_id": employee_ids[i % len(employee_ids)],
+                "strengths": f"Strength {i}",
+                "areas_to_improve": f"Improve {i}",
+                "sentiment": "positive",
+                "tags": ["bench"],
+            })
+            resp.raise_for_status()
+            samples.append((time.perf_counter() - start) * 1000)
+
+    commands_before = command_counter.count
+    await asyncio.gather(*(submit(i) for i in range(requests)))
+    return samples, (command_counter.count - commands_before) / requests
+
+
+async def run(requests, concurrency, team_size):
+    await reset_database()
+    manager_id, employee_ids = await seed_team(team_size)
+    headers = {"Authorization": f"Bearer {auth.create_access_token({'sub': 'bench_manager'})}"}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        inline, inline_trips = await submit_all(client, headers, employee_ids, requests, concurrency)
+
+        await notifications.queue.start()
+        queued, queued_trips = await submit_all(client, headers, employee_ids, requests, concurrency)
+        pending = notifications.queue.pending()
+        start = time.perf_counter()
+        await notifications.queue.stop()
+        drain_ms = (time.perf_counter() - start) * 1000
+
+    written = await db.notifications.count_documents({})
+    await reset_database()
+    report("notification_queue", {
+        "requests": requests,
+        "concurrency": concurrency,
+        "batch_size": notifications.queue.batch_size,
+        "flush_ms": notifications.NOTIFICATION_FLUSH_MS,
+        "inline": {**summarize(inline), "mongo_round_trips_per_request": round(inline_trips, 2)},
+        "write_behind": {**summarize(queued), "mongo_round_trips_per_request": round(queued_trips, 2)},
+        "pending_after_requests": pending,
+        "drain_ms": round(drain_ms, 3),
+        "notifications_written": written,
+        "notifications_expected": requests * 2,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--team-size", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency, args.team_size))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""Export a large feedback history to PDF and measure event-loop stalls.
+
+Rendering runs in the export worker pool, so the loop-lag probe should stay
+close to its sleep interval even while a 10k-entry export is in progress.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from ._common import report, reset_database, seed_feedbacks, seed_team, summarize
+from app import crud, export
+
+
+async def probe_loop_lag(interval, stop, samples):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - start - interval) * 1000)
+
+
+async def run(sizes, repeat):
+    results = []
+    for size in sizes:
+        await reset_database()
+        manager_id, employee_ids = await seed_team(50)
+        await seed_feedbacks(manager_id, employee_ids, size)
+
+        export_ms, lag_ms, pdf_bytes = [], [], 0
+        for _ in range(repeat):
+            stop = asyncio.Event()
+            probe = asyncio.create_task(probe_loop_lag(0.005, stop, lag_ms))
+            start = time.perf_counter()
+            batches = crud.iter_feedback_batches("manager_id", manager_id, batch_size=export.PDF_EXPORT_BATCH_SIZE)
+            path = await export.render_feedback_pdf(batches)
+            export_ms.append((time.perf_counter() - start) * 1000)
+            stop.set()
+            await probe
+            pdf_bytes = os.path.getsize(path)
+            export.remove_file(path)
+        results.append({
+            "feedbacks": size,
+            "pdf_bytes": pdf_bytes,
+            "export": summarize(export_ms),
+            "loop_lag": summarize(lag_ms),
+        })
+    await reset_database()
+    report("pdf_export", results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
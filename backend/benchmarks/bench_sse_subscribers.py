@@ -0,0 +1,87 @@
+"""Thousands of idle SSE subscribers on one process.
+
+Drives pubsub.event_stream directly (the generator behind
+/api/notifications/stream) for every subscriber, then publishes
+notifications to random users. Reports memory per idle subscriber,
+publish-to-delivery latency and how many unread-count queries were made.
+No MongoDB is needed; the unread count is stubbed.
+"""
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+
+from ._common import report, summarize
+from app.pubsub import InProcessBroker
+from app import pubsub
+
+
+async def consume(stream, delivered):
+    async for frame in stream:
+        if frame.startswith("event: notification"):
+            delivered.append(time.perf_counter())
+
+
+async def run(subscribers, events, heartbeat):
+    broker = InProcessBroker()
+    pubsub.broker = broker  # event_stream subscribes through the module-level broker
+    count_queries = 0
+
+    async def unread_count():
+        nonlocal count_queries
+        count_queries += 1
+        return 0
+
+    async def never_disconnected():
+        return False
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    delivered = {}
+    tasks = []
+    for i in range(subscribers):
+        user_id = f"user{i}"
+        delivered[user_id] = []
+        stream = pubsub.event_stream(user_id, never_disconnected, unread_count, heartbeat=heartbeat)
+        tasks.append(asyncio.create_task(consume(stream, delivered[user_id])))
+    await asyncio.sleep(0.5)  # let every stream send its initial frame and go idle
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    idle_queries = count_queries
+
+    latencies = []
+    for _ in range(events):
+        user_id = f"user{random.randrange(subscribers)}"
+        seen = len(delivered[user_id])
+        sent = time.perf_counter()
+        await broker.publish(user_id, {"type": "notification", "id": "x", "message": "bench", "created_at": ""})
+        while len(delivered[user_id]) == seen:
+            await asyncio.sleep(0)
+        latencies.append((delivered[user_id][-1] - sent) * 1000)
+
+    await asyncio.sleep(heartbeat * 2)  # a couple of heartbeat ticks while idle
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    report("sse_subscribers", {
+        "subscribers": subscribers,
+        "bytes_per_idle_subscriber": round((after - before) / subscribers),
+        "unread_count_queries_on_connect": idle_queries,
+        "unread_count_queries_total": count_queries,
+        "delivery": summarize(latencies),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--heartbeat", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.subscribers, args.events, args.heartbeat))
+
+
+if __name__ == "__main__":
+    main()
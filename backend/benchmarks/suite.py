@@ -0,0 +1,173 @@
+"""End-to-end benchmark suite for the backend API.
+
+Seeds the bench database with configurable volumes, drives the FastAPI app
+in-process through httpx's ASGI transport and reports, per scenario,
+throughput, latency percentiles and Mongo round-trips per request as JSON:
+
+    python -m benchmarks.suite --managers 5 --team-size 20 --output bench.json
+    python -m benchmarks.suite --baseline bench.json   # show p95 change vs an earlier run
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from ._common import command_counter, db, percentile, reset_database, seed_feedbacks, seed_team
+from app import auth, crud, database
+from app.main import app
+from app.pdf_cache import pdf_cache
+
+PASSWORD = "benchpassword"
+
+
+async def seed(managers, team_size, feedbacks_per_employee, notifications_per_user):
+    hashed = await auth.get_password_hash(PASSWORD)
+    fixtures = []
+    for m in range(managers):
+        manager_id, employee_ids = await seed_team(team_size, manager_name=f"suite_manager{m}")
+        await seed_feedbacks(manager_id, employee_ids, feedbacks_per_employee * team_size)
+        fixtures.append({"manager": f"suite_manager{m}", "employee": f"suite_manager{m}_emp0"})
+    await db.users.update_many({}, {"$set": {"hashed_password": hashed}})
+
+    now = datetime.utcnow()
+    async for user in db.users.find({}, {"_id": 1}):
+        docs = [
+            {"user_id": str(user["_id"]), "message": f"Bench notification {i}", "read": False,
+             "created_at": now - timedelta(minutes=i)}
+            for i in range(notifications_per_user)
+        ]
+        if docs:
+            await db.notifications.insert_many(docs)
+    await database.ensure_indexes()
+    await crud.ensure_feedback_stats()
+    return fixtures
+
+
+def scenarios(fixtures):
+    manager = fixtures[0]["manager"]
+    employee = fixtures[0]["employee"]
+    bearer = lambda username: {"Authorization": f"Bearer {auth.create_access_token({'sub': username})}"}
+
+    def export_cold(client):
+        pdf_cache.clear()
+        return client.get("/api/feedbacks/export", headers=bearer(manager))
+
+    return {
+        "login": lambda client: client.post("/api/token", data={"username": manager, "password": PASSWORD}),
+        "me": lambda client: client.get("/api/me", headers=bearer(employee)),
+        "feedbacks_manager": lambda client: client.get("/api/feedbacks", headers=bearer(manager)),
+        "feedbacks_employee": lambda client: client.get("/api/feedbacks", headers=bearer(employee)),
+        "dashboard_manager": lambda client: client.get("/api/dashboard", headers=bearer(manager)),
+        "manager_team": lambda client: client.get("/api/manager/team", headers=bearer(manager)),
+        "manager_stats": lambda client: client.get("/api/manager/stats", headers=bearer(manager)),
+        "notifications": lambda client: client.get("/api/notifications", headers=bearer(employee)),
+        "export_history_cached": lambda client: client.get("/api/feedbacks/export", headers=bearer(manager)),
+        "export_history_cold": export_cold,
+    }
+
+
+async def run_scenario(client, make_request, requests, concurrency):
+    samples, errors = [], 0
+    remaining = requests
+    lock = asyncio.Lock()
+
+    async def worker():
+        nonlocal remaining, errors
+        while True:
+            async with lock:
+                if remaining == 0:
+                    return
+                remaining -= 1
+            start = time.perf_counter()
+            resp = await make_request(client)
+            samples.append((time.perf_counter() - start) * 1000)
+            if resp.status_code >= 400:
+                errors += 1
+
+    await make_request(client)  # warm caches and connection pool
+    commands_before = command_counter.count
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2),
+        "mean_ms": round(sum(samples) / len(samples), 3),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "mongo_round_trips_per_request": round((command_counter.count - commands_before) / requests, 2),
+    }
+
+
+async def run(args):
+    await reset_database()
+    fixtures = await seed(args.managers, args.team_size, args.feedbacks_per_employee, args.notifications_per_user)
+    selected = scenarios(fixtures)
+    if args.only:
+        selected = {name: fn for name, fn in selected.items() if name in args.only}
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, make_request in selected.items():
+            requests = args.requests if not name.startswith(("login", "export")) else max(1, args.requests // 10)
+            results[name] = await run_scenario(client, make_request, requests, args.concurrency)
+            print(f"{name}: {results[name]['throughput_rps']} req/s, p95 {results[name]['p95_ms']} ms", file=sys.stderr)
+    await reset_database()
+
+    return {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "config": {
+            "managers": args.managers,
+            "team_size": args.team_size,
+            "feedbacks_per_employee": args.feedbacks_per_employee,
+            "notifications_per_user": args.notifications_per_user,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": results,
+    }
+
+
+def compare(current, baseline):
+    changes = {}
+    for name, result in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before and before["p95_ms"]:
+            changes[name] = f"{(result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100:+.1f}% p95"
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--managers", type=int, default=3)
+    parser.add_argument("--team-size", type=int, default=20)
+    parser.add_argument("--feedbacks-per-employee", type=int, default=25)
+    parser.add_argument("--notifications-per-user", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--only", nargs="+", help="run only these scenarios")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON report to compare p95 latencies against")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    if args.baseline:
+        with open(args.baseline) as f:
+            result["vs_baseline"] = compare(result, json.load(f))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Requests/sec for /dashboard on a running frontend.
+
+Run it against a frontend built from the commit before the pooled client
+and again against the current tree to compare throughput:
+
+    python benchmarks/bench_dashboard.py --username manager1 --password yourpassword
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+async def worker(client, deadline, samples, errors):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        resp = await client.get("/dashboard")
+        if resp.status_code == 200:
+            samples.append((time.perf_counter() - start) * 1000)
+        else:
+            errors.append(resp.status_code)
+
+
+async def run(url, username, password, concurrency, duration):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        resp = await client.post("/login", data={"username": username, "password": password})
+        if "access_token" not in client.cookies:
+            raise SystemExit(f"login failed with status {resp.status_code}")
+
+        samples, errors = [], []
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client, deadline, samples, errors) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "benchmark": "frontend_dashboard",
+        "url": url,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "requests_per_second": round(len(samples) / elapsed, 2),
+        "errors": len(errors),
+        "mean_ms": round(statistics.mean(samples), 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+    }, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8001")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=15)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.username, args.password, args.concurrency, args.duration))
+
+
+if __name__ == "__main__":
+    main()
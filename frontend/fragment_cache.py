@@ -0,0 +1,36 @@
+from collections import OrderedDict
+import hashlib
+
+class FragmentCache:
+    """LRU of rendered page fragments, keyed per user and backend URL.
+
+    Each entry remembers the backend ETag it was rendered from, so a 304 on
+    the next conditional request means the cached HTML is still current.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(token: str, path: str, params: dict = None):
+        # Hash the token so raw credentials aren't held as cache keys
+        user = hashlib.sha256(token.encode()).hexdigest()
+        return user, path, tuple(sorted((params or {}).items()))
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key, etag: str, html: str, page: dict):
+        self._entries[key] = (etag, html, page)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
\ No newline at end of file
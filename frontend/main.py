@@ -1,27 +1,161 @@
 from fastapi import FastAPI, Request, Form
-from fastapi.responses import RedirectResponse, HTMLResponse, Response
+from fastapi.responses import RedirectResponse, HTMLResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from starlette.middleware.gzip import GZipMiddleware
+from fragment_cache import FragmentCache
+import asyncio
+import hashlib
 import httpx
 import os
+import uuid
 
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+BACKEND_MAX_CONNECTIONS = int(os.getenv("BACKEND_MAX_CONNECTIONS", "100"))
+BACKEND_MAX_KEEPALIVE = int(os.getenv("BACKEND_MAX_KEEPALIVE", "20"))
+BACKEND_KEEPALIVE_EXPIRY = float(os.getenv("BACKEND_KEEPALIVE_EXPIRY", "30"))
+BACKEND_TIMEOUT = float(os.getenv("BACKEND_TIMEOUT", "10"))
+BACKEND_CONNECT_TIMEOUT = float(os.getenv("BACKEND_CONNECT_TIMEOUT", "5"))
+BACKEND_HTTP2 = os.getenv("BACKEND_HTTP2", "false").lower() in ("1", "true", "yes")
+BACKEND_MAX_STREAMS = int(os.getenv("BACKEND_MAX_STREAMS", "1000"))
+FRAGMENT_CACHE_SIZE = int(os.getenv("FRAGMENT_CACHE_SIZE", "2000"))
+STATIC_DIR = "static"
+
+class VersionedStaticFiles(StaticFiles):
+    """Static files that browsers may cache for a year when requested with ?v=<version>."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if b"v=" in scope.get("query_string", b""):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+def static_version() -> str:
+    # Changes whenever any static file does, so the versioned URLs bust caches on deploy
+    digest = hashlib.sha1()
+    for root, _, files in sorted(os.walk(STATIC_DIR)):
+        for name in sorted(files):
+            with open(os.path.join(root, name), "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:12]
 
 app = FastAPI()
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Compress only the static mount; page responses include the SSE proxy, which must not be buffered
+app.mount("/static", GZipMiddleware(VersionedStaticFiles(directory=STATIC_DIR), minimum_size=500), name="static")
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["static_version"] = static_version()
+
+# Rendered fragments, reused while the backend answers 304 for their ETag
+fragment_cache = FragmentCache(FRAGMENT_CACHE_SIZE)
+
+# One pooled client for the whole app so backend calls reuse keep-alive connections
+http_client: httpx.AsyncClient = None
+# Long-lived notification streams get their own pool so they can't starve page requests
+stream_client: httpx.AsyncClient = None
+
+@app.on_event("startup")
+async def startup():
+    global http_client, stream_client
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=BACKEND_MAX_CONNECTIONS,
+            max_keepalive_connections=BACKEND_MAX_KEEPALIVE,
+            keepalive_expiry=BACKEND_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(BACKEND_TIMEOUT, connect=BACKEND_CONNECT_TIMEOUT),
+        http2=BACKEND_HTTP2,
+    )
+    stream_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=BACKEND_MAX_STREAMS, max_keepalive_connections=0),
+        timeout=httpx.Timeout(BACKEND_TIMEOUT, connect=BACKEND_CONNECT_TIMEOUT, read=None),
+    )
+
+@app.on_event("shutdown")
+async def shutdown():
+    await http_client.aclose()
+    await stream_client.aclose()
 
 async def get_user_from_token(token: str):
     if not token:
         return None
     headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
+    try:
+        resp = await http_client.get(f"{BACKEND_URL}/api/me", headers=headers)
+        resp.raise_for_status()
+        return resp.json()
+    except (httpx.RequestError, httpx.HTTPStatusError):
+        return None
+
+async def render_fragment(token: str, path: str, params: dict, build):
+    """Fetch ``path`` and render the fragment ``build(resp)`` describes, reusing the cached render on a 304.
+
+    ``build`` returns (template name, template context, page context); the page
+    context is cached alongside the HTML for the parts of the page outside it.
+    Raises httpx errors like a plain request would.
+    """
+    key = FragmentCache.key(token, path, params)
+    cached = fragment_cache.get(key)
+    headers = {"Authorization": f"Bearer {token}"}
+    if cached:
+        headers["If-None-Match"] = cached[0]
+    resp = await http_client.get(f"{BACKEND_URL}{path}", headers=headers, params=params or None)
+    if resp.status_code == 304 and cached:
+        fragment_cache.hits += 1
+        return cached[1], cached[2]
+    resp.raise_for_status()
+    fragment_cache.misses += 1
+    name, context, page = build(resp)
+    html = templates.get_template(name).render(context)
+    if resp.headers.get("ETag"):
+        fragment_cache.set(key, resp.headers["ETag"], html, page)
+    return html, page
+
+def logout_redirect():
+    # The token was rejected; clear it so the login page doesn't bounce back
+    response = RedirectResponse("/login")
+    response.delete_cookie("access_token")
+    return response
+
+def is_unauthorized(error: Exception) -> bool:
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code == 401
+
+def backend_error_message(error: Exception) -> str:
+    if isinstance(error, httpx.HTTPStatusError):
         try:
-            resp = await client.get(f"{BACKEND_URL}/api/me", headers=headers)
-            resp.raise_for_status()
-            return resp.json()
-        except (httpx.RequestError, httpx.HTTPStatusError):
-            return None
+            detail = error.response.json().get("detail")
+        except ValueError:
+            detail = None
+        if isinstance(detail, str):
+            return detail
+        return f"The server returned status {error.response.status_code}."
+    return "Could not reach the backend. Please try again."
+
+def build_feedback_history(q: str):
+    def build(resp):
+        context = {"feedbacks": resp.json(), "next_cursor": resp.headers.get("X-Next-Cursor"), "q": q}
+        return "fragments/feedback_history.html", context, {}
+    return build
+
+def build_dashboard(resp):
+    data = resp.json()
+    user = data["user"]
+    context = {
+        "feedbacks": data["feedbacks"],
+        "next_cursor": data.get("next_cursor"),
+        "unread_count": data.get("unread_count", 0),
+    }
+    if user["role"] == "manager":
+        context["team"] = data.get("team") or []
+        context["stats"] = data.get("stats") or {"totals": {"total": 0, "sentiment": {}, "tags": {}}}
+    name = f"fragments/dashboard_{user['role']}.html"
+    return name, context, {"user": user, "unread_count": context["unread_count"]}
+
+def build_notifications(resp):
+    context = {"notifications": resp.json(), "next_cursor": resp.headers.get("X-Next-Cursor")}
+    return "fragments/notifications.html", context, {}
 
 @app.get("/")
 async def root():
@@ -33,15 +167,14 @@ async def login_get(request: Request):
 
 @app.post("/login", response_class=HTMLResponse)
 async def login_post(request: Request, username: str = Form(...), password: str = Form(...)):
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(f"{BACKEND_URL}/api/token", data={"username": username, "password": password})
-        if resp.status_code == 200:
-            token = resp.json()["access_token"]
-            response = RedirectResponse("/dashboard", status_code=302)
-            response.set_cookie("access_token", token, httponly=True)
-            return response
-        else:
-            return templates.TemplateResponse("login.html", {"request": request, "error": "Invalid credentials"})
+    resp = await http_client.post(f"{BACKEND_URL}/api/token", data={"username": username, "password": password})
+    if resp.status_code == 200:
+        token = resp.json()["access_token"]
+        response = RedirectResponse("/dashboard", status_code=302)
+        response.set_cookie("access_token", token, httponly=True)
+        return response
+    else:
+        return templates.TemplateResponse("login.html", {"request": request, "error": "Invalid credentials"})
 
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(request: Request):
@@ -49,50 +182,33 @@ async def dashboard(request: Request):
     if not token:
         return RedirectResponse("/login")
 
-    user = await get_user_from_token(token)
-    if not user:
-        # Clear cookie and redirect if token is invalid
-        response = RedirectResponse("/login")
-        response.delete_cookie("access_token")
-        return response
-
-    message = request.query_params.get("message")
+    after = request.query_params.get("after")
+    params = {"after": after} if after else {}
     error = request.query_params.get("error")
-
-    headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        try: #fetching feedbacks
-            resp = await client.get(f"{BACKEND_URL}/api/feedbacks", headers=headers)
-            resp.raise_for_status()
-            feedbacks = resp.json()
-        except (httpx.RequestError, httpx.HTTPStatusError):
-            feedbacks = []
-        # Fetch unread notification count
-        try:
-            unread_resp = await client.get(f"{BACKEND_URL}/api/notifications/unread_count", headers=headers)
-            unread_resp.raise_for_status()
-            unread_count = unread_resp.json().get("unread_count", 0)
-        except Exception:
-            unread_count = 0
+    try: # user, first feedback page, unread count and team in one hop
+        fragment, page = await render_fragment(token, "/api/dashboard", params, build_dashboard)
+    except (httpx.RequestError, httpx.HTTPStatusError) as e:
+        if is_unauthorized(e):
+            return logout_redirect()
+        # Anything else (bad cursor, backend error) keeps the session and shows the page shell
+        user = await get_user_from_token(token)
+        if not user:
+            return logout_redirect()
+        fragment, page = "", {"user": user, "unread_count": 0}
+        error = backend_error_message(e)
 
     context = {
         "request": request,
-        "user": user,
-        "feedbacks": feedbacks,
-        "message": message,
+        "user": page["user"],
+        "fragment": fragment,
+        "message": request.query_params.get("message"),
         "error": error,
-        "unread_count": unread_count
+        "unread_count": page["unread_count"],
+        # Sent back with the request-feedback form so a double submit is deduplicated
+        "request_key": uuid.uuid4().hex
     }
 
-    if user["role"] == "manager":
-        async with httpx.AsyncClient() as client:
-            try:
-                resp = await client.get(f"{BACKEND_URL}/api/manager/team", headers=headers)
-                resp.raise_for_status()
-                team = resp.json()
-            except (httpx.RequestError, httpx.HTTPStatusError):
-                team = []
-        context["team"] = team
+    if page["user"]["role"] == "manager":
         return templates.TemplateResponse("dashboard_manager.html", context)
     else:  # Employee
         return templates.TemplateResponse("dashboard_employee.html", context)
@@ -111,14 +227,13 @@ async def peer_review_form(request: Request):
     error = request.query_params.get("error")
     
     headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.get(f"{BACKEND_URL}/api/employee/peers", headers=headers)
-            resp.raise_for_status()
-            peers = resp.json()
-        except (httpx.RequestError, httpx.HTTPStatusError) as e:
-            peers = []
-            error = f"Could not load peers: {e}"
+    try:
+        resp = await http_client.get(f"{BACKEND_URL}/api/employee/peers", headers=headers)
+        resp.raise_for_status()
+        peers = resp.json()
+    except (httpx.RequestError, httpx.HTTPStatusError) as e:
+        peers = []
+        error = f"Could not load peers: {e}"
 
     return templates.TemplateResponse(
         "peer_review.html", 
@@ -145,13 +260,12 @@ async def handle_peer_review_submission(request: Request):
             return RedirectResponse("/peer-review?error=All fields are required.", status_code=302)
 
         headers = {"Authorization": f"Bearer {token}"}
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                f"{BACKEND_URL}/api/employee/peer_review",
-                json=review,
-                headers=headers
-            )
-            resp.raise_for_status()
+        resp = await http_client.post(
+            f"{BACKEND_URL}/api/employee/peer_review",
+            json=review,
+            headers=headers
+        )
+        resp.raise_for_status()
 
     except httpx.HTTPStatusError as e:
         error_message = e.response.json().get("detail", "An unknown error occurred.")
@@ -172,34 +286,39 @@ async def my_peer_reviews_page(request: Request):
         return RedirectResponse("/login")
     
     headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.get(f"{BACKEND_URL}/api/employee/peer_reviews", headers=headers)
-            resp.raise_for_status()
-            reviews = resp.json()
-        except (httpx.RequestError, httpx.HTTPStatusError):
-            reviews = []
+    try:
+        resp, summary_resp = await asyncio.gather(
+            http_client.get(f"{BACKEND_URL}/api/employee/peer_reviews", headers=headers),
+            http_client.get(f"{BACKEND_URL}/api/employee/peer_reviews/summary", headers=headers),
+        )
+        resp.raise_for_status()
+        reviews = resp.json()
+        summary = summary_resp.json() if summary_resp.status_code == 200 else None
+    except (httpx.RequestError, httpx.HTTPStatusError):
+        reviews = []
+        summary = None
 
     return templates.TemplateResponse(
         "my_peer_reviews.html",
-        {"request": request, "user": user, "reviews": reviews}
+        {"request": request, "user": user, "reviews": reviews, "summary": summary}
     )
 
 @app.post("/request-feedback")
-async def handle_request_feedback(request: Request):
+async def handle_request_feedback(request: Request, request_key: str = Form("")):
     token = request.cookies.get("access_token")
     if not token:
         return RedirectResponse("/login")
 
     headers = {"Authorization": f"Bearer {token}"}
+    if request_key:
+        headers["Idempotency-Key"] = request_key
     redirect_url = "/dashboard?message=Feedback request sent successfully!"
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                f"{BACKEND_URL}/api/employee/request_feedback",
-                headers=headers
-            )
-            resp.raise_for_status()
+        resp = await http_client.post(
+            f"{BACKEND_URL}/api/employee/request_feedback",
+            headers=headers
+        )
+        resp.raise_for_status()
     except httpx.HTTPStatusError as e:
         error_message = "An unknown error occurred."
         try:
@@ -226,18 +345,17 @@ async def feedback_submit(request: Request, employee_id: str, strengths: str = F
     if not token:
         return RedirectResponse("/login")
     tags_list = [t.strip() for t in tags.split(",") if t.strip()]
-    async with httpx.AsyncClient() as client:
-        await client.post(
-            f"{BACKEND_URL}/api/feedback",
-            json={
-                "employee_id": employee_id,
-                "strengths": strengths,
-                "areas_to_improve": areas_to_improve,
-                "sentiment": sentiment,
-                "tags": tags_list
-            },
-            headers={"Authorization": f"Bearer {token}"}
-        )
+    await http_client.post(
+        f"{BACKEND_URL}/api/feedback",
+        json={
+            "employee_id": employee_id,
+            "strengths": strengths,
+            "areas_to_improve": areas_to_improve,
+            "sentiment": sentiment,
+            "tags": tags_list
+        },
+        headers={"Authorization": f"Bearer {token}"}
+    )
     return RedirectResponse("/dashboard", status_code=302)
 
 @app.get("/feedback/history", response_class=HTMLResponse)
@@ -246,77 +364,130 @@ async def feedback_history(request: Request):
     if not token:
         return RedirectResponse("/login")
     
+    after = request.query_params.get("after")
+    q = (request.query_params.get("q") or "").strip()
+    params = {"after": after} if after else {}
+    path = "/api/feedbacks"
+    if q:
+        params["q"] = q
+        path = "/api/feedbacks/search"
     headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        user_resp = await client.get(f"{BACKEND_URL}/api/me", headers=headers)
-        feedbacks_resp = await client.get(f"{BACKEND_URL}/api/feedbacks", headers=headers)
-        
+    try:
+        user_resp, (fragment, _) = await asyncio.gather(
+            http_client.get(f"{BACKEND_URL}/api/me", headers=headers),
+            render_fragment(token, path, params, build_feedback_history(q)),
+        )
+        user_resp.raise_for_status()
+    except (httpx.RequestError, httpx.HTTPStatusError) as e:
+        if is_unauthorized(e):
+            return logout_redirect()
+        return templates.TemplateResponse("feedback_history.html", {"request": request, "fragment": "", "q": q, "user": None, "error": backend_error_message(e)})
     user = user_resp.json()
-    feedbacks = feedbacks_resp.json()
     
-    return templates.TemplateResponse("feedback_history.html", {"request": request, "feedbacks": feedbacks, "user": user})
+    return templates.TemplateResponse("feedback_history.html", {"request": request, "fragment": fragment, "q": q, "user": user, "error": None})
 
 @app.get("/notifications", response_class=HTMLResponse)
 async def notifications_page(request: Request):
     token = request.cookies.get("access_token")
     if not token:
         return RedirectResponse("/login")
+    after = request.query_params.get("after")
     headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        user_resp = await client.get(f"{BACKEND_URL}/api/me", headers=headers)
-        notes_resp = await client.get(f"{BACKEND_URL}/api/notifications", headers=headers)
+    try:
+        user_resp, (fragment, _) = await asyncio.gather(
+            http_client.get(f"{BACKEND_URL}/api/me", headers=headers),
+            render_fragment(token, "/api/notifications", {"after": after} if after else {}, build_notifications),
+        )
+        user_resp.raise_for_status()
+    except (httpx.RequestError, httpx.HTTPStatusError) as e:
+        if is_unauthorized(e):
+            return logout_redirect()
+        return templates.TemplateResponse("notifications.html", {"request": request, "fragment": "", "user": None, "error": backend_error_message(e)})
     user = user_resp.json()
-    notes = notes_resp.json()
-    return templates.TemplateResponse("notifications.html", {"request": request, "notifications": notes, "user": user})
+    return templates.TemplateResponse("notifications.html", {"request": request, "fragment": fragment, "user": user, "error": None})
+
+def export_headers(request: Request, token: str):
+    headers = {"Authorization": f"Bearer {token}"}
+    # Let the backend answer repeat downloads with 304 instead of re-rendering
+    if request.headers.get("if-none-match"):
+        headers["If-None-Match"] = request.headers["if-none-match"]
+    return headers
+
+def export_response(response: httpx.Response):
+    passthrough = {k: v for k, v in response.headers.items() if k.lower() in ("etag", "cache-control")}
+    if response.status_code == 304:
+        return Response(status_code=304, headers=passthrough)
+    if response.status_code == 200:
+        return Response(content=response.content, media_type="application/pdf", headers=passthrough)
+    return HTMLResponse("Could not export.", status_code=response.status_code)
+
+@app.get("/notifications/stream")
+async def notifications_stream(request: Request):
+    token = request.cookies.get("access_token")
+    if not token:
+        return Response(status_code=401)
+    backend_request = stream_client.build_request(
+        "GET", f"{BACKEND_URL}/api/notifications/stream", headers={"Authorization": f"Bearer {token}"}
+    )
+    try:
+        resp = await stream_client.send(backend_request, stream=True)
+    except httpx.RequestError:
+        return Response(status_code=502)
+    if resp.status_code != 200:
+        await resp.aclose()
+        return Response(status_code=resp.status_code)
+    return StreamingResponse(
+        resp.aiter_raw(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(resp.aclose),
+    )
 
 @app.get("/feedback/export")
 async def export_all_feedback(request: Request):
     token = request.cookies.get("access_token")
     if not token:
         return RedirectResponse(url="/login")
-    headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{BACKEND_URL}/api/feedbacks/export", headers=headers)
-        if response.status_code == 200:
-            return Response(content=response.content, media_type="application/pdf")
-        return HTMLResponse("Could not export.", status_code=response.status_code)
+    headers = export_headers(request, token)
+    response = await http_client.get(f"{BACKEND_URL}/api/feedbacks/export", headers=headers)
+    return export_response(response)
 
 @app.get("/feedback/{feedback_id}/export")
 async def export_one_feedback(request: Request, feedback_id: str):
     token = request.cookies.get("access_token")
     if not token:
         return RedirectResponse(url="/login")
-    headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{BACKEND_URL}/api/feedback/{feedback_id}/export", headers=headers)
-        if response.status_code == 200:
-            return Response(content=response.content, media_type="application/pdf")
-        return HTMLResponse("Could not export.", status_code=response.status_code)
+    headers = export_headers(request, token)
+    response = await http_client.get(f"{BACKEND_URL}/api/feedback/{feedback_id}/export", headers=headers)
+    return export_response(response)
 
 @app.post("/feedback/{feedback_id}/comment")
 async def post_comment(request: Request, feedback_id: str, comment: str = Form(...)):
     token = request.cookies.get("access_token")
     if not token:
         return RedirectResponse("/login")
-    async with httpx.AsyncClient() as client:
-        await client.post(
-            f"{BACKEND_URL}/api/feedback/{feedback_id}/comment",
-            data={"comment": comment},
-            headers={"Authorization": f"Bearer {token}"}
-        )
+    await http_client.post(
+        f"{BACKEND_URL}/api/feedback/{feedback_id}/comment",
+        data={"comment": comment},
+        headers={"Authorization": f"Bearer {token}"}
+    )
     return RedirectResponse("/dashboard", status_code=302)
 
+async def get_feedback(headers: dict, feedback_id: str):
+    # None when the feedback doesn't exist or isn't visible to this user
+    resp = await http_client.get(f"{BACKEND_URL}/api/feedback/{feedback_id}", headers=headers)
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    return resp.json()
+
 @app.get("/feedback/edit/{feedback_id}", response_class=HTMLResponse)
 async def edit_feedback_form(request: Request, feedback_id: str):
     token = request.cookies.get("access_token")
     if not token:
         return RedirectResponse("/login")
     headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(f"{BACKEND_URL}/api/feedbacks", headers=headers)
-        resp.raise_for_status()
-        feedbacks = resp.json()
-    feedback = next((fb for fb in feedbacks if fb["id"] == feedback_id), None)
+    feedback = await get_feedback(headers, feedback_id)
     if not feedback:
         return RedirectResponse("/dashboard?error=Feedback not found")
     return templates.TemplateResponse("edit_feedback.html", {"request": request, "feedback": feedback, "message": None, "error": None})
@@ -338,18 +509,16 @@ async def edit_feedback_submit(request: Request, feedback_id: str):
         "tags": tags
     }
     headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        resp = await client.put(f"{BACKEND_URL}/api/feedback/{feedback_id}", json=update, headers=headers)
-        if resp.status_code == 200:
-            return RedirectResponse("/dashboard?message=Feedback updated successfully!", status_code=302)
-        else:
-            error = resp.json().get("detail", "Failed to update feedback.")
-            # Re-render form with error
-            resp2 = await client.get(f"{BACKEND_URL}/api/feedbacks", headers=headers)
-            resp2.raise_for_status()
-            feedbacks = resp2.json()
-            feedback = next((fb for fb in feedbacks if fb["id"] == feedback_id), None)
-            return templates.TemplateResponse("edit_feedback.html", {"request": request, "feedback": feedback, "message": None, "error": error})
+    resp = await http_client.put(f"{BACKEND_URL}/api/feedback/{feedback_id}", json=update, headers=headers)
+    if resp.status_code == 200:
+        return RedirectResponse("/dashboard?message=Feedback updated successfully!", status_code=302)
+    else:
+        error = resp.json().get("detail", "Failed to update feedback.")
+        # Re-render form with error
+        feedback = await get_feedback(headers, feedback_id)
+        if not feedback:
+            return RedirectResponse(f"/dashboard?error={error}", status_code=302)
+        return templates.TemplateResponse("edit_feedback.html", {"request": request, "feedback": feedback, "message": None, "error": error})
 
 @app.post("/notifications/clear_all")
 async def clear_all_notifications(request: Request):
@@ -357,6 +526,5 @@ async def clear_all_notifications(request: Request):
     if not token:
         return RedirectResponse("/login")
     headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        await client.post(f"{BACKEND_URL}/api/notifications/clear_all", headers=headers)
+    await http_client.post(f"{BACKEND_URL}/api/notifications/clear_all", headers=headers)
     return RedirectResponse("/notifications", status_code=302) 
\ No newline at end of file